@@ -854,10 +854,13 @@ class EnhancedInteractiveMultimodalRAG:
             
             # 验证输入
             if source_type == "path":
-                for source in sources:
-                    if not os.path.exists(source):
-                        self.ui.display_error(f"文件不存在: {source}")
-                        return False
+                missing_sources = [source for source in sources if not os.path.exists(source)]
+                if missing_sources:
+                    # 一次列出所有缺失的文件
+                    with self.ui.batch():
+                        for source in missing_sources:
+                            self.ui.display_error(f"文件不存在: {source}")
+                    return False
             
             # 设置知识库
             self.ui.display_loading(f"正在加载 {len(sources)} 个文档...")
@@ -931,78 +934,83 @@ class EnhancedInteractiveMultimodalRAG:
         # 显示欢迎信息
         self.ui.print_welcome()
         
-        # 初始化系统
-        if not self.initialize_system():
-            return
+        try:
+            # 初始化系统
+            if not self.initialize_system():
+                return
         
-        # 设置知识库
-        if not self.setup_knowledge_base():
-            return
+            # 设置知识库
+            if not self.setup_knowledge_base():
+                return
         
-        # 主查询循环
-        while True:
-            try:
-                # 获取用户查询
-                query = self.ui.get_user_query()
+            # 主查询循环
+            while True:
+                try:
+                    # 获取用户查询
+                    query = self.ui.get_user_query()
                 
-                if not query:
-                    continue
-                elif query.lower() in ['quit', 'exit', '退出']:
-                    break
-                elif query.lower() in ['status', '状态']:
-                    status = self.rag_system.get_system_status()
-                    self.ui.display_system_status(status)
-                    continue
-                elif query.lower() in ['performance', '性能']:
-                    perf_data = self.rag_system.get_performance_summary()
-                    self.ui.display_performance_summary(perf_data)
-                    continue
-                elif query.lower() in ['reload', '重新加载']:
-                    if self.setup_knowledge_base():
-                        self.ui.display_success("知识库已重新加载")
-                    continue
-                elif query.lower() in ['manage', 'docs', '文档管理']:
-                    self.manage_documents()
-                    continue
+                    if not query:
+                        continue
+                    elif query.lower() in ['quit', 'exit', '退出']:
+                        break
+                    elif query.lower() in ['status', '状态']:
+                        status = self.rag_system.get_system_status()
+                        self.ui.display_system_status(status)
+                        continue
+                    elif query.lower() in ['performance', '性能']:
+                        perf_data = self.rag_system.get_performance_summary()
+                        self.ui.display_performance_summary(perf_data)
+                        continue
+                    elif query.lower() in ['reload', '重新加载']:
+                        if self.setup_knowledge_base():
+                            self.ui.display_success("知识库已重新加载")
+                        continue
+                    elif query.lower() in ['manage', 'docs', '文档管理']:
+                        self.manage_documents()
+                        continue
                 
-                # 获取检索模式
-                retrieval_mode = self.ui.get_retrieval_mode()
+                    # 获取检索模式
+                    retrieval_mode = self.ui.get_retrieval_mode()
                 
-                # 执行查询
-                self.ui.display_loading(f"正在执行{retrieval_mode}...")
-                results = self.rag_system.enhanced_query(query, retrieval_mode)
+                    # 执行查询
+                    self.ui.display_loading(f"正在执行{retrieval_mode}...")
+                    results = self.rag_system.enhanced_query(query, retrieval_mode)
                 
-                # 显示结果
-                self.ui.display_results(results)
+                    # 显示结果
+                    self.ui.display_results(results)
                 
-                # 询问是否保存结果
-                if 'error' not in results and self.ui.ask_save_results():
-                    self.ui.save_results_to_file(results)
+                    # 询问是否保存结果
+                    if 'error' not in results and self.ui.ask_save_results():
+                        self.ui.save_results_to_file(results)
                 
-                # 询问是否继续
-                if not self.ui.ask_continue():
-                    break
+                    # 询问是否继续
+                    if not self.ui.ask_continue():
+                        break
                     
-            except KeyboardInterrupt:
-                self.ui.display_warning("用户中断操作")
-                if not self.ui.ask_continue():
-                    break
-            except Exception as e:
-                self.ui.display_error(f"系统错误: {e}")
-                continue
-        
-        # 显示最终性能报告
-        if self.rag_system and self.rag_system.performance_monitor:
-            print("\n" + "="*60)
-            print("📊 最终性能报告")
-            print("="*60)
-            self.rag_system.performance_monitor.print_performance_report()
-            
-            # 询问是否保存性能数据
-            if self.ui.ask_save_results():
-                self.rag_system.performance_monitor.save_metrics_to_file()
+                except KeyboardInterrupt:
+                    self.ui.display_warning("用户中断操作")
+                    if not self.ui.ask_continue():
+                        break
+                except Exception as e:
+                    self.ui.display_error(f"系统错误: {e}")
+                    continue
         
-        self.ui.display_success("感谢使用增强的交互式多模态RAG系统!")
+            # 显示最终性能报告
+            if self.rag_system and self.rag_system.performance_monitor:
+                print("\n" + "="*60)
+                print("📊 最终性能报告")
+                print("="*60)
+                self.rag_system.performance_monitor.print_performance_report()
+            
+                # 询问是否保存性能数据
+                if self.ui.ask_save_results():
+                    self.rag_system.performance_monitor.save_metrics_to_file()
+            
+            self.ui.display_success("感谢使用增强的交互式多模态RAG系统!")
+        finally:
+            # 无论正常退出、提前返回还是出现异常，都释放网页研究系统的网络会话和缓存
+            if self.rag_system:
+                self.rag_system.web_research_system.close()
 
 def main():
     """主函数"""
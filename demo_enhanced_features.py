@@ -133,6 +133,8 @@ def demo_web_research():
             print(f"\n📄 分析摘要:")
             print(analysis[:300] + "..." if len(analysis) > 300 else analysis)
         
+        web_system.close()
+        
     except Exception as e:
         print(f"❌ 网页研究演示失败: {e}")
 
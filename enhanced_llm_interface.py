@@ -4,11 +4,32 @@
 
 import os
 import time
+import hashlib
+import sqlite3
+import threading
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Literal, Tuple
 from dataclasses import dataclass
 
-@dataclass
+# orjson直接在bytes上编解码，比requests内置的json处理少一次转换
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    import json
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+class ContentFilterException(Exception):
+    """请求内容被API安全审核拦截，重试不会成功"""
+
+# 内容审核拦截时返回给调用方的提示，与其他失败一样不写入缓存
+_CONTENT_FILTER_REPLY = "抱歉，该请求内容未通过安全审核，无法生成回答。"
+
+@dataclass(slots=True)
 class LLMConfig:
     """LLM配置类"""
     model_name: str = "Qwen/Qwen2.5-72B-Instruct"
@@ -18,10 +39,15 @@ class LLMConfig:
     timeout: int = 60
     max_retries: int = 3
     retry_delay: float = 1.0
+    cache_path: Optional[str] = None  # SQLite响应缓存文件，None表示不启用
+    cache_ttl: float = 7 * 24 * 3600  # 缓存有效期（秒）
 
 class EnhancedLLMInterface:
     """增强的LLM接口 - 提供更稳定的CAMEL集成和降级机制"""
     
+    # CAMEL消息类在首次使用时导入并缓存，后续调用跳过导入机制
+    _BaseMessage = None
+    
     def __init__(self, api_key: str, config: Optional[LLMConfig] = None):
         if not api_key:
             raise ValueError("API密钥不能为空")
@@ -31,9 +57,77 @@ class EnhancedLLMInterface:
         self.camel_model = None
         self.camel_available = False
         
+        # 复用HTTP连接，请求头只构建一次
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+        
+        # 可选的持久化响应缓存，多个进程可共享同一个缓存文件
+        self._cache_db = None
+        self._cache_lock = threading.Lock()
+        if self.config.cache_path:
+            self._initialize_cache(self.config.cache_path)
+        
         # 尝试初始化CAMEL模型
         self._initialize_camel()
         
+    def _initialize_cache(self, cache_path: str):
+        """初始化SQLite响应缓存 - WAL模式支持多进程并发读写"""
+        try:
+            cache_dir = os.path.dirname(cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            
+            db = sqlite3.connect(cache_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache("
+                    "key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+                    "created REAL, hits INTEGER DEFAULT 0)"
+                )
+            self._cache_db = db
+            
+        except sqlite3.Error as e:
+            print(f"⚠ 响应缓存初始化失败，将不使用缓存: {e}")
+            self._cache_db = None
+    
+    def _cache_key(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        """根据模型、生成参数和提示词计算缓存键"""
+        raw = f"{self.config.api_url}\n{self.config.model_name}\n{max_tokens}\n{temperature}\n{prompt}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        """读取未过期的缓存响应"""
+        min_created = time.time() - self.config.cache_ttl
+        try:
+            with self._cache_lock, self._cache_db:
+                row = self._cache_db.execute(
+                    "SELECT response FROM llm_cache WHERE key=? AND created>?",
+                    (key, min_created)
+                ).fetchone()
+                if row is not None:
+                    self._cache_db.execute("UPDATE llm_cache SET hits=hits+1 WHERE key=?", (key,))
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"⚠ 读取响应缓存失败: {e}")
+            return None
+    
+    def _cache_put(self, key: str, response: str):
+        """写入缓存响应"""
+        try:
+            with self._cache_lock, self._cache_db:
+                self._cache_db.execute(
+                    "INSERT OR REPLACE INTO llm_cache(key, model, response, created, hits) "
+                    "VALUES (?, ?, ?, ?, 0)",
+                    (key, self.config.model_name, response, time.time())
+                )
+        except sqlite3.Error as e:
+            print(f"⚠ 写入响应缓存失败: {e}")
+    
     def _initialize_camel(self):
         """初始化CAMEL模型 - 增强错误处理"""
         try:
@@ -71,12 +165,18 @@ class EnhancedLLMInterface:
             print("将使用直接API调用作为备用方案")
             self.camel_available = False
     
+    @classmethod
+    def _base_message_cls(cls):
+        """获取CAMEL的BaseMessage类（延迟导入）"""
+        if cls._BaseMessage is None:
+            from camel.messages import BaseMessage
+            cls._BaseMessage = BaseMessage
+        return cls._BaseMessage
+    
     def _test_camel_model(self) -> bool:
         """测试CAMEL模型是否正常工作"""
         try:
-            from camel.messages import BaseMessage
-            
-            test_message = BaseMessage.make_user_message(
+            test_message = self._base_message_cls().make_user_message(
                 role_name="user",
                 content="测试消息，请回复'测试成功'"
             )
@@ -100,27 +200,104 @@ class EnhancedLLMInterface:
                 temperature: Optional[float] = None) -> str:
         """生成文本 - 智能选择CAMEL或直接API"""
         
-        # 使用提供的参数或默认配置
-        max_tokens = max_tokens or self.config.max_tokens
-        temperature = temperature or self.config.temperature
+        # 仅在未传参时使用默认配置，显式的 temperature=0.0 不会被覆盖
+        max_tokens = self.config.max_tokens if max_tokens is None else max_tokens
+        temperature = self.config.temperature if temperature is None else temperature
+        
+        if self._cache_db is None:
+            return self._generate_impl(prompt, max_tokens, temperature)[0]
         
+        cache_key = self._cache_key(prompt, max_tokens, temperature)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result, ok = self._generate_impl(prompt, max_tokens, temperature)
+        # 失败时返回的是错误提示，不写入缓存
+        if ok and result:
+            self._cache_put(cache_key, result)
+        return result
+    
+    def _generate_impl(self, prompt: str, max_tokens: int, temperature: float) -> Tuple[str, bool]:
+        """生成文本实现 - 返回 (文本, 是否成功)"""
         # 优先尝试CAMEL模型
         if self.camel_available:
             try:
-                return self._generate_with_camel(prompt, max_tokens, temperature)
+                return self._generate_with_camel(prompt, max_tokens, temperature), True
             except Exception as e:
                 print(f"⚠ CAMEL生成失败，切换到直接API: {str(e)[:50]}...")
                 # 标记CAMEL不可用，避免后续重复尝试
                 self.camel_available = False
         
         # 使用直接API调用
-        return self._generate_with_api(prompt, max_tokens, temperature)
+        try:
+            return self._generate_with_api(prompt, max_tokens, temperature)
+        except ContentFilterException as e:
+            print(f"⚠ {str(e)[:100]}")
+            return _CONTENT_FILTER_REPLY, False
+    
+    def generate_stream(self, prompt: str, max_tokens: Optional[int] = None,
+                        temperature: Optional[float] = None) -> Iterator[str]:
+        """流式生成文本 - 逐块返回内容，失败时降级为普通API调用"""
+        
+        max_tokens = self.config.max_tokens if max_tokens is None else max_tokens
+        temperature = self.config.temperature if temperature is None else temperature
+        
+        data = {
+            "model": self.config.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True
+        }
+        
+        received = False
+        try:
+            with self._session.post(
+                self.config.api_url,
+                data=_json_dumps(data),
+                timeout=self.config.timeout,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    status = self._classify_response(response)
+                    # 永久性错误改用普通API调用也不会成功，直接返回提示
+                    if status == "content_filter":
+                        print(f"⚠ 请求内容被API安全审核拦截: {response.text[:200]}")
+                        yield _CONTENT_FILTER_REPLY
+                        return
+                    if status == "fatal":
+                        last_error = f"API调用失败 (状态码: {response.status_code}): {response.text}"
+                        print(last_error)
+                        yield f"抱歉，无法生成回答。错误: {last_error}"
+                        return
+                    raise Exception(f"API调用失败 (状态码: {response.status_code})")
+                
+                # 解析SSE数据块: "data: {...}"，以 "data: [DONE]" 结束
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == b"[DONE]":
+                        break
+                    choices = _json_loads(payload).get('choices')
+                    if not choices:
+                        continue
+                    content = (choices[0].get('delta') or {}).get('content')
+                    if content:
+                        received = True
+                        yield content
+                        
+        except Exception as e:
+            # 已经输出部分内容时不能再重新生成，否则会重复
+            if received:
+                raise
+            print(f"⚠ 流式生成失败，切换到普通API调用: {str(e)[:50]}...")
+            yield self._generate_with_api(prompt, max_tokens, temperature)[0]
     
     def _generate_with_camel(self, prompt: str, max_tokens: int, temperature: float) -> str:
         """使用CAMEL模型生成"""
-        from camel.messages import BaseMessage
-        
-        user_message = BaseMessage.make_user_message(
+        user_message = self._base_message_cls().make_user_message(
             role_name="user",
             content=prompt
         )
@@ -141,13 +318,8 @@ class EnhancedLLMInterface:
         else:
             raise Exception("CAMEL模型返回了无效响应格式")
     
-    def _generate_with_api(self, prompt: str, max_tokens: int, temperature: float) -> str:
-        """使用直接API调用生成 - 增强重试机制"""
-        
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+    def _generate_with_api(self, prompt: str, max_tokens: int, temperature: float) -> Tuple[str, bool]:
+        """使用直接API调用生成 - 增强重试机制，返回 (文本, 是否成功)"""
         
         data = {
             "model": self.config.model_name,
@@ -157,28 +329,38 @@ class EnhancedLLMInterface:
         }
         
         last_error = None
+        attempts = 0
         
         for attempt in range(self.config.max_retries):
+            attempts = attempt + 1
             try:
                 print(f"API调用尝试 {attempt + 1}/{self.config.max_retries}")
                 
-                response = requests.post(
+                response = self._session.post(
                     self.config.api_url,
-                    headers=headers,
-                    json=data,
+                    data=_json_dumps(data),
                     timeout=self.config.timeout
                 )
                 
-                if response.status_code == 200:
-                    result = response.json()
+                status = self._classify_response(response)
+                if status == "ok":
+                    result = _json_loads(response.content)
                     if 'choices' in result and len(result['choices']) > 0:
                         content = result['choices'][0]['message']['content']
                         print("✓ API调用成功")
-                        return content
-                    else:
-                        raise Exception(f"API响应格式错误: {result}")
+                        return content, True
+                    last_error = f"API响应格式错误: {result}"
+                    print(f"{last_error} (尝试 {attempt + 1})")
+                elif status == "content_filter":
+                    raise ContentFilterException(f"请求内容被API安全审核拦截: {response.text[:200]}")
+                elif status == "fatal":
+                    # 永久性错误重试也不会成功，直接放弃
+                    last_error = f"API调用失败 (状态码: {response.status_code}): {response.text}"
+                    print(last_error)
+                    break
                 else:
-                    raise Exception(f"API调用失败 (状态码: {response.status_code}): {response.text}")
+                    last_error = f"API调用失败 (状态码: {response.status_code}): {response.text}"
+                    print(f"{last_error} (尝试 {attempt + 1})")
                     
             except requests.exceptions.Timeout:
                 last_error = f"API调用超时 (尝试 {attempt + 1})"
@@ -186,16 +368,37 @@ class EnhancedLLMInterface:
             except requests.exceptions.ConnectionError:
                 last_error = f"网络连接错误 (尝试 {attempt + 1})"
                 print(last_error)
-            except Exception as e:
-                last_error = f"API调用失败: {str(e)}"
+            except requests.exceptions.RequestException as e:
+                last_error = f"API请求异常: {str(e)}"
+                print(f"{last_error} (尝试 {attempt + 1})")
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                last_error = f"API响应解析失败: {str(e)}"
                 print(f"{last_error} (尝试 {attempt + 1})")
             
             # 如果不是最后一次尝试，等待后重试
             if attempt < self.config.max_retries - 1:
                 time.sleep(self.config.retry_delay * (attempt + 1))  # 递增延迟
         
-        # 所有重试都失败了
-        return f"抱歉，经过{self.config.max_retries}次尝试后仍无法生成回答。最后错误: {last_error}"
+        # 所有重试都失败了，或遇到永久性错误提前放弃
+        return f"抱歉，经过{attempts}次尝试后仍无法生成回答。最后错误: {last_error}", False
+    
+    @staticmethod
+    def _classify_response(response) -> Literal["ok", "retry", "content_filter", "fatal"]:
+        """根据状态码判断响应是否成功、可重试或应立即失败"""
+        code = response.status_code
+        if code == 200:
+            return "ok"
+        if code == 429 or code >= 500:
+            return "retry"
+        if code == 400:
+            # GLM等接口以错误码1301表示内容审核拦截
+            try:
+                error = _json_loads(response.content).get('error') or {}
+                if str(error.get('code')) == "1301":
+                    return "content_filter"
+            except (ValueError, AttributeError):
+                pass
+        return "fatal"
     
     def get_status(self) -> Dict[str, Any]:
         """获取LLM接口状态"""
@@ -203,5 +406,6 @@ class EnhancedLLMInterface:
             "camel_available": self.camel_available,
             "model_name": self.config.model_name,
             "api_url": self.config.api_url,
-            "max_retries": self.config.max_retries
+            "max_retries": self.config.max_retries,
+            "response_cache": self.config.cache_path if self._cache_db is not None else None
         }
\ No newline at end of file
@@ -3,189 +3,500 @@
 """
 
 import os
-import io
+import re
+import shutil
 import base64
+import asyncio
+import functools
+import importlib
+import importlib.util
+import logging
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 
-# 图像处理
-try:
-    from PIL import Image
-    import pytesseract
-    IMAGE_OCR_AVAILABLE = True
-except ImportError:
-    print("⚠ PIL或pytesseract未安装，图像OCR功能不可用")
-    IMAGE_OCR_AVAILABLE = False
+# 可选依赖（PyMuPDF、OCR、OpenCV、numba、表格处理、unstructured）导入开销较大，
+# 在首次使用时才导入；可用性通过find_spec检查，不会触发实际导入
+@functools.cache
+def _module_available(name: str) -> bool:
+    """检查模块是否已安装"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
 
-# 表格处理
-try:
-    import pandas as pd
-    import tabula
-    TABLE_PROCESSING_AVAILABLE = True
-except ImportError:
-    print("⚠ pandas或tabula未安装，表格处理功能受限")
-    TABLE_PROCESSING_AVAILABLE = False
+@functools.cache
+def _lazy(name: str):
+    """导入模块并缓存，后续调用直接返回"""
+    return importlib.import_module(name)
 
-# PDF处理
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    print("⚠ PyMuPDF未安装，使用基础PDF处理")
-    PYMUPDF_AVAILABLE = False
+# 小于该尺寸的图像（图标、装饰线等）不进行OCR
+MIN_OCR_IMAGE_SIZE = 64
 
-from unstructured.partition.auto import partition
-from unstructured.documents.elements import Text, Image as UnstructuredImage, Table
+# 图像中未识别到文字时使用的占位文本
+NO_TEXT_DETECTED = "图像内容 (未检测到文本)"
+
+# 默认Tesseract参数：按单一文本块分割(psm 6)，仅使用LSTM引擎(oem 1)，不做反色检测
+DEFAULT_OCR_CONFIG = '--psm 6 --oem 1 -c tessedit_do_invert=0'
+OCR_LANGUAGES = 'chi_sim+eng'
+
+# 水平边缘密度低于该值的图像（纯色块、渐变、大面积空白）视为不含文字
+TEXT_LIKELIHOOD_THRESHOLD = 0.002
+
+def _text_likelihood_numpy(gray: np.ndarray, row_stride: int = 2, edge_threshold: int = 40) -> float:
+    """估计灰度图包含文字的可能性 - 文字笔画会产生密集的水平明暗跳变"""
+    rows = gray[::row_stride].astype(np.int16)
+    if rows.shape[1] < 2:
+        return 0.0
+    return float((np.abs(np.diff(rows, axis=1)) > edge_threshold).mean())
+
+def _text_likelihood_loop(gray, row_stride=2, edge_threshold=40):
+    """_text_likelihood_numpy的逐像素版本，供numba编译"""
+    height, width = gray.shape
+    if width < 2:
+        return 0.0
+    edges = 0
+    total = 0
+    for y in range(0, height, row_stride):
+        for x in range(width - 1):
+            diff = np.int32(gray[y, x + 1]) - np.int32(gray[y, x])
+            if diff > edge_threshold or diff < -edge_threshold:
+                edges += 1
+        total += width - 1
+    return edges / total if total else 0.0
+
+class _KeywordClassifier:
+    """按优先级排列的关键词规则，一次扫描文本即可找出命中的最高优先级规则
+    
+    安装了pyahocorasick时使用Aho-Corasick自动机，否则使用等价的正则表达式（含重叠匹配）
+    """
+    
+    def __init__(self, rules: Tuple[Tuple[Tuple[str, ...], str], ...]):
+        self._labels = [label for _, label in rules]
+        self._rule_of = {}
+        for rule_index, (keywords, _) in enumerate(rules):
+            for keyword in keywords:
+                self._rule_of.setdefault(keyword, rule_index)
+        self._automaton = None
+        self._pattern = None
+    
+    def _build(self):
+        """首次使用时构建匹配器"""
+        if _module_available('ahocorasick'):
+            automaton = _lazy('ahocorasick').Automaton()
+            for keyword, rule_index in self._rule_of.items():
+                automaton.add_word(keyword, rule_index)
+            automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            alternatives = '|'.join(re.escape(keyword) for keyword in self._rule_of)
+            self._pattern = re.compile(f"(?=({alternatives}))")
+    
+    def classify(self, text_lower: str) -> Optional[str]:
+        """返回命中的最高优先级规则对应的标注，未命中返回None"""
+        if self._automaton is None and self._pattern is None:
+            self._build()
+        
+        if self._automaton is not None:
+            matched = {rule_index for _, rule_index in self._automaton.iter(text_lower)}
+        else:
+            matched = {self._rule_of[m.group(1)] for m in self._pattern.finditer(text_lower)}
+        
+        return self._labels[min(matched)] if matched else None
+
+# 图像/表格类型识别规则：(关键词, 类型标注)，按优先级排列
+_IMAGE_TYPE_CLASSIFIER = _KeywordClassifier((
+    (('chart', 'graph', '图表', '图形'), " [类型: 图表/图形]"),
+    (('diagram', 'flow', '流程', '示意'), " [类型: 流程图/示意图]"),
+    (('photo', 'picture', '照片', '图片'), " [类型: 照片/图片]"),
+))
+
+_TABLE_TYPE_CLASSIFIER = _KeywordClassifier((
+    (('数据', 'data', '统计', 'statistics'), " [类型: 数据统计表]"),
+    (('比较', 'comparison', '对比'), " [类型: 比较表]"),
+))
+
+@functools.cache
+def _text_likelihood_kernel():
+    """获取文字可能性估计函数 - 安装了numba时在首次使用时编译"""
+    if _module_available('numba'):
+        numba = _lazy('numba')
+        return numba.njit(cache=True, fastmath=True)(_text_likelihood_loop)
+    return _text_likelihood_numpy
+
+@functools.cache
+def _java_available() -> bool:
+    """tabula依赖Java运行时，进程内只检查一次PATH中是否有java"""
+    return shutil.which('java') is not None
+
+def _completed_future(result) -> Future:
+    """创建已完成的Future，用于无需OCR的图像"""
+    future = Future()
+    future.set_result(result)
+    return future
+
+# 模块级共享的HTTP会话，多次下载复用连接
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def _get_http_session():
+    """获取共享的requests会话（首次使用时创建）"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            session = requests.Session()
+            # 连接失败和网关类错误自动退避重试，避免整份PDF因瞬时故障处理失败
+            retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                          allowed_methods=frozenset(['GET']))
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_session = session
+    return _http_session
+
+@dataclass(slots=True)
+class MultimodalMetadata:
+    """待嵌入内容的元数据 - 每个文本/图像/表格块一个"""
+    type: str
+    source: str
+    multimodal_id: str
+    page: Optional[int] = None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """兼容字典式读取，检索器等下游代码仍可使用 meta.get('type')"""
+        return getattr(self, key, default)
+    
+    def __getitem__(self, key: str) -> Any:
+        """兼容 meta['type'] 形式的读取"""
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典，用于JSON序列化或向量库元数据；没有页码时不含page键"""
+        if self.page is None:
+            return {'type': self.type, 'source': self.source, 'multimodal_id': self.multimodal_id}
+        return {'type': self.type, 'source': self.source, 'page': self.page, 'multimodal_id': self.multimodal_id}
 
 class EnhancedMultimodalProcessor:
     """增强的多模态处理器"""
     
-    def __init__(self):
-        self.image_ocr_available = IMAGE_OCR_AVAILABLE
-        self.table_processing_available = TABLE_PROCESSING_AVAILABLE
-        self.pymupdf_available = PYMUPDF_AVAILABLE
+    def __init__(self, ocr_config: str = DEFAULT_OCR_CONFIG):
+        """ocr_config为Tesseract命令行参数，如稀疏文字的插图可使用 '--psm 11'"""
+        self.ocr_config = ocr_config
+        self.logger = logging.getLogger(__name__)
+        self.pytesseract_available = _module_available('PIL') and _module_available('pytesseract')
+        self.tesserocr_available = _module_available('PIL') and _module_available('tesserocr')
+        self.image_ocr_available = self.pytesseract_available or self.tesserocr_available
+        self.table_processing_available = _module_available('pandas') and _module_available('tabula')
+        self.pymupdf_available = _module_available('fitz')
+        self._mupdf_lock = threading.Lock()
+        
+        # Tesseract API按线程创建，同一个实例不能被多个线程同时使用
+        self._tess_local = threading.local()
+        self._tess_apis = []
+        self._tess_lock = threading.Lock()
+        
+        # 页面和OCR线程池在处理器生命周期内复用，OCR线程数固定，
+        # 每个线程的Tesseract API只加载一次语言模型，跨文档复用，由close()释放
+        self._page_executor: Optional[ThreadPoolExecutor] = None
+        self._ocr_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         
         print("多模态处理器初始化:")
         print(f"  图像OCR: {'✓' if self.image_ocr_available else '✗'}")
         print(f"  表格处理: {'✓' if self.table_processing_available else '✗'}")
         print(f"  PyMuPDF: {'✓' if self.pymupdf_available else '✗'}")
+        print(f"  进程内OCR(tesserocr): {'✓' if self.tesserocr_available else '✗'}")
     
     def process_pdf_with_multimodal(self, pdf_source: str, is_url: bool = False) -> Dict[str, Any]:
         """处理PDF并提取多模态内容"""
         
-        # 首先尝试使用PyMuPDF进行更好的多模态提取
-        if self.pymupdf_available:
+        # 远程PDF只下载一次，两种处理方式共用同一个临时文件
+        with self._local_pdf(pdf_source, is_url) as pdf_path:
+            result = None
+            # 首先尝试使用PyMuPDF进行更好的多模态提取
+            if self.pymupdf_available:
+                try:
+                    result = self._process_with_pymupdf(pdf_path)
+                except Exception as e:
+                    print(f"⚠ PyMuPDF处理失败，使用unstructured: {e}")
+            
+            # 降级到unstructured
+            if result is None:
+                result = self._process_with_unstructured(pdf_path)
+        
+        # 内部使用紧凑的MultimodalMetadata，对外仍返回普通字典
+        result['metadata_to_embed'] = [meta.to_dict() for meta in result['metadata_to_embed']]
+        return result
+    
+    def process_pdfs_with_multimodal(self, pdf_urls: List[str]) -> List[Dict[str, Any]]:
+        """批量处理远程PDF - 并发下载，每个文档下载完成后立即开始解析"""
+        try:
+            import aiohttp
+        except ImportError:
+            print("⚠ aiohttp未安装，逐个下载处理")
+            return [self._process_pdf_url_safely(url) for url in pdf_urls]
+        
+        return asyncio.run(self._process_pdfs_async(pdf_urls, aiohttp))
+    
+    async def _process_pdfs_async(self, pdf_urls: List[str], aiohttp) -> List[Dict[str, Any]]:
+        """并发下载并处理多个PDF，结果顺序与输入一致"""
+        loop = asyncio.get_running_loop()
+        
+        async def download_and_process(session, url: str) -> Dict[str, Any]:
+            tmp_path = None
             try:
-                return self._process_with_pymupdf(pdf_source, is_url)
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+                        tmp_path = tmp.name
+                        async for chunk in response.content.iter_chunked(1 << 16):
+                            tmp.write(chunk)
+                
+                # 解析是CPU密集型操作，放到线程池中与其他文档的下载重叠执行
+                return await loop.run_in_executor(None, self.process_pdf_with_multimodal, tmp_path, False)
+            
             except Exception as e:
-                print(f"⚠ PyMuPDF处理失败，使用unstructured: {e}")
+                print(f"⚠ PDF处理失败 ({url}): {e}")
+                return self._empty_result(str(e))
+            finally:
+                if tmp_path:
+                    self._remove_temp_file(tmp_path)
         
-        # 降级到unstructured
-        return self._process_with_unstructured(pdf_source, is_url)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=30)
+        connector = aiohttp.TCPConnector(limit=10)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            return await asyncio.gather(*(download_and_process(session, url) for url in pdf_urls))
+    
+    def _process_pdf_url_safely(self, url: str) -> Dict[str, Any]:
+        """处理单个远程PDF，失败时返回空结果而不是抛出异常"""
+        try:
+            return self.process_pdf_with_multimodal(url, is_url=True)
+        except Exception as e:
+            print(f"⚠ PDF处理失败 ({url}): {e}")
+            return self._empty_result(str(e))
+    
+    @staticmethod
+    def _empty_result(error: str) -> Dict[str, Any]:
+        """处理失败时的空结果"""
+        return {
+            'texts_to_embed': [],
+            'metadata_to_embed': [],
+            'multimodal_content_store': {},
+            'processing_method': 'failed',
+            'error': error
+        }
+    
+    @contextmanager
+    def _local_pdf(self, pdf_source: str, is_url: bool):
+        """获取PDF的本地路径 - 远程PDF流式下载到临时文件，用完后删除"""
+        if not is_url:
+            yield pdf_source
+            return
+        
+        tmp_path = self._download_pdf(pdf_source)
+        try:
+            yield tmp_path
+        finally:
+            self._remove_temp_file(tmp_path)
+    
+    def _download_pdf(self, url: str) -> str:
+        """流式下载PDF到临时文件，不在内存中保留完整文档"""
+        tmp = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        try:
+            with tmp, _get_http_session().get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    tmp.write(chunk)
+        except Exception:
+            self._remove_temp_file(tmp.name)
+            raise
+        return tmp.name
+    
+    @staticmethod
+    def _remove_temp_file(path: str):
+        """删除临时文件，忽略删除失败"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
     
     def _process_with_pymupdf(self, pdf_source: str, is_url: bool = False) -> Dict[str, Any]:
         """使用PyMuPDF处理PDF - 更好的多模态支持"""
-        import requests
-        
-        # 获取PDF文档
-        if is_url:
-            response = requests.get(pdf_source, timeout=30)
-            response.raise_for_status()
-            pdf_data = response.content
-            doc = fitz.open(stream=pdf_data, filetype="pdf")
-        else:
-            doc = fitz.open(pdf_source)
+        with self._local_pdf(pdf_source, is_url) as pdf_path:
+            # fitz.open对本地文件按需读取，无需把整个文档加载到内存
+            doc = _lazy('fitz').open(pdf_path)
+            
+            # 一次性提取全部表格，不可用时在每页中使用page.find_tables()
+            tables_by_page = self._extract_all_tables(pdf_path, doc)
+            
+            return self._process_pymupdf_document(doc, tables_by_page)
+    
+    def _process_pymupdf_document(self, doc,
+                                  tables_by_page: Optional[Dict[int, List[str]]] = None) -> Dict[str, Any]:
+        """按页提取PyMuPDF文档中的文本、图像和表格"""
+        page_count = len(doc)
+        print(f"使用PyMuPDF处理PDF，共{page_count}页")
         
-        texts_to_embed = []
-        metadata_to_embed = []
+        # 按页并行处理，图像OCR提交到独立的线程池，页面数少、图像多时同样可以并行
+        # 同一图像（如每页重复的页眉logo）在整个文档中只OCR一次
+        ocr_cache = {}
+        page_executor, ocr_executor = self._get_executors()
+        try:
+            page_results = list(page_executor.map(
+                lambda page_num: self._process_page(doc, page_num, ocr_cache, ocr_executor, tables_by_page),
+                range(page_count)
+            ))
+        finally:
+            doc.close()
+        
+        # 条目总数已知，结果列表一次性分配
+        total_items = sum(map(len, page_results))
+        texts_to_embed = [None] * total_items
+        metadata_to_embed = [None] * total_items
         multimodal_content_store = {}
         multimodal_id_counter = 0
         
-        print(f"使用PyMuPDF处理PDF，共{len(doc)}页")
+        # 收集完成后按页顺序分配ID，保证与串行处理的结果一致
+        for page_num, page_items in enumerate(page_results):
+            for content_type, text, store_entry in page_items:
+                multimodal_id = f"multimodal_{multimodal_id_counter}"
+                texts_to_embed[multimodal_id_counter] = text
+                metadata_to_embed[multimodal_id_counter] = MultimodalMetadata(
+                    content_type, 'pdf', multimodal_id, page_num + 1
+                )
+                multimodal_id_counter += 1
+                
+                if store_entry is not None:
+                    multimodal_content_store[multimodal_id] = store_entry
+        
+        return {
+            'texts_to_embed': texts_to_embed,
+            'metadata_to_embed': metadata_to_embed,
+            'multimodal_content_store': multimodal_content_store,
+            'processing_method': 'PyMuPDF'
+        }
+    
+    def _process_page(self, doc, page_num: int,
+                      ocr_cache: Dict[Tuple[int, int], Future],
+                      ocr_executor: ThreadPoolExecutor,
+                      tables_by_page: Optional[Dict[int, List[str]]] = None) -> List[Tuple[str, str, Optional[Dict[str, Any]]]]:
+        """处理单页内容，返回 (类型, 待嵌入文本, 多模态存储项) 列表
+        
+        ocr_cache以 (xref, smask) 为键保存OCR结果的Future，首个遇到该图像的页面将OCR提交到ocr_executor；
+        tables_by_page为预先批量提取的表格（页码从1开始），为None时逐页查找表格
+        """
+        page_items = []
+        images = []
         
-        for page_num in range(len(doc)):
+        # MuPDF不是线程安全的，文档访问需要串行化；OCR在锁外并行执行
+        with self._mupdf_lock:
             page = doc.load_page(page_num)
             
             # 提取文本
             text = page.get_text()
-            if text.strip():
-                multimodal_id = f"multimodal_{multimodal_id_counter}"
-                multimodal_id_counter += 1
-                
-                texts_to_embed.append(text.strip())
-                metadata_to_embed.append({
-                    'type': 'text',
-                    'source': 'pdf',
-                    'page': page_num + 1,
-                    'multimodal_id': multimodal_id
-                })
             
             # 提取图像
             image_list = page.get_images()
             for img_index, img in enumerate(image_list):
-                try:
-                    # 获取图像数据
-                    xref = img[0]
-                    pix = fitz.Pixmap(doc, xref)
-                    
-                    if pix.n - pix.alpha < 4:  # 确保是RGB或灰度图像
-                        img_data = pix.tobytes("png")
-                        
-                        # 进行OCR提取文本
-                        ocr_text = self._extract_text_from_image(img_data)
-                        
-                        if ocr_text.strip():
-                            multimodal_id = f"multimodal_{multimodal_id_counter}"
-                            multimodal_id_counter += 1
-                            
-                            image_description = f"图像内容 (第{page_num + 1}页): {ocr_text}"
-                            texts_to_embed.append(image_description)
-                            metadata_to_embed.append({
-                                'type': 'image',
-                                'source': 'pdf',
-                                'page': page_num + 1,
-                                'multimodal_id': multimodal_id
-                            })
-                            
-                            multimodal_content_store[multimodal_id] = {
-                                'type': 'image',
-                                'data': ocr_text,
-                                'page': page_num + 1,
-                                'image_index': img_index
-                            }
-                            
-                            print(f"✓ 提取图像文本 (第{page_num + 1}页): {len(ocr_text)}字符")
-                    
-                    pix = None  # 释放内存
-                    
-                except Exception as e:
-                    print(f"⚠ 图像提取失败 (第{page_num + 1}页): {e}")
-                    continue
+                # 获取图像数据
+                xref, smask = img[0], img[1]
+                cache_key = (xref, smask)
+                
+                ocr_future = ocr_cache.get(cache_key)
+                if ocr_future is None:
+                    ocr_future = self._submit_image_ocr(doc, img, ocr_executor, page_num)
+                    ocr_cache[cache_key] = ocr_future
+                images.append((img_index, ocr_future))
             
             # 提取表格
-            tables = self._extract_tables_from_page(page, page_num + 1)
-            for table_data in tables:
-                multimodal_id = f"multimodal_{multimodal_id_counter}"
-                multimodal_id_counter += 1
-                
-                table_description = f"表格内容 (第{page_num + 1}页): {table_data}"
-                texts_to_embed.append(table_description)
-                metadata_to_embed.append({
-                    'type': 'table',
-                    'source': 'pdf',
+            if tables_by_page is not None:
+                tables = tables_by_page.get(page_num + 1, [])
+            else:
+                tables = self._extract_tables_from_page(page, page_num + 1)
+        
+        if text.strip():
+            page_items.append(('text', text.strip(), None))
+        
+        for img_index, ocr_future in images:
+            ocr_text = ocr_future.result()
+            
+            if ocr_text and ocr_text.strip():
+                image_description = f"图像内容 (第{page_num + 1}页): {ocr_text}"
+                page_items.append(('image', image_description, {
+                    'type': 'image',
+                    'data': ocr_text,
                     'page': page_num + 1,
-                    'multimodal_id': multimodal_id
-                })
-                
-                multimodal_content_store[multimodal_id] = {
-                    'type': 'table',
-                    'data': table_data,
-                    'page': page_num + 1
-                }
+                    'image_index': img_index
+                }))
                 
-                print(f"✓ 提取表格 (第{page_num + 1}页): {len(table_data)}字符")
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"提取图像文本 (第{page_num + 1}页): {len(ocr_text)}字符")
         
-        doc.close()
+        for table_data in tables:
+            table_description = f"表格内容 (第{page_num + 1}页): {table_data}"
+            page_items.append(('table', table_description, {
+                'type': 'table',
+                'data': table_data,
+                'page': page_num + 1
+            }))
+            
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"提取表格 (第{page_num + 1}页): {len(table_data)}字符")
         
-        return {
-            'texts_to_embed': texts_to_embed,
-            'metadata_to_embed': metadata_to_embed,
-            'multimodal_content_store': multimodal_content_store,
-            'processing_method': 'PyMuPDF'
-        }
+        return page_items
+    
+    def _submit_image_ocr(self, doc, img: tuple, ocr_executor: ThreadPoolExecutor, page_num: int) -> Future:
+        """解码图像并提交OCR任务，返回结果的Future；无需OCR的图像直接返回已完成的Future
+        
+        需在持有MuPDF锁时调用
+        """
+        try:
+            # get_images已给出尺寸和色彩空间，先据此过滤，避免无用的解码
+            xref, width, height, colorspace = img[0], img[2], img[3], img[5]
+            if colorspace == 'DeviceCMYK':
+                return _completed_future(None)
+            if width < MIN_OCR_IMAGE_SIZE or height < MIN_OCR_IMAGE_SIZE:
+                return _completed_future(NO_TEXT_DETECTED)
+            
+            pix = _lazy('fitz').Pixmap(doc, xref)
+            if pix.n - pix.alpha >= 4:  # 只处理RGB或灰度图像
+                return _completed_future(None)
+            
+            # 通过samples_mv直接读取Pixmap缓冲区，只复制出灰度图
+            samples = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(
+                pix.height, pix.width, pix.n
+            )
+            gray = self._to_grayscale(samples)
+            if np.may_share_memory(gray, samples):
+                # 单通道时灰度图只是视图，Pixmap释放前需要复制
+                gray = gray.copy()
+            pix = None  # 释放内存
+            
+            return ocr_executor.submit(self._extract_text_from_image, gray)
+            
+        except Exception as e:
+            self.logger.warning(f"图像提取失败 (第{page_num + 1}页): {e}")
+            return _completed_future(None)
     
     def _process_with_unstructured(self, pdf_source: str, is_url: bool = False) -> Dict[str, Any]:
         """使用unstructured处理PDF"""
-        import requests
-        
-        if is_url:
-            response = requests.get(pdf_source, timeout=30)
-            response.raise_for_status()
-            pdf_bytes = response.content
-            pdf_file = io.BytesIO(pdf_bytes)
-            elements = partition(file=pdf_file)
-        else:
-            elements = partition(filename=pdf_source)
+        from unstructured.partition.auto import partition
+        from unstructured.documents.elements import Text, Image as UnstructuredImage, Table
+        
+        with self._local_pdf(pdf_source, is_url) as pdf_path:
+            elements = partition(filename=pdf_path)
         
         texts_to_embed = []
         metadata_to_embed = []
@@ -204,20 +515,12 @@ class EnhancedMultimodalProcessor:
             
             if isinstance(element, Text):
                 texts_to_embed.append(element_text)
-                metadata_to_embed.append({
-                    'type': 'text',
-                    'source': 'pdf',
-                    'multimodal_id': multimodal_id
-                })
+                metadata_to_embed.append(MultimodalMetadata('text', 'pdf', multimodal_id))
             elif isinstance(element, UnstructuredImage):
                 # 增强图像处理
                 enhanced_image_text = self._enhance_image_description(element_text)
                 texts_to_embed.append(enhanced_image_text)
-                metadata_to_embed.append({
-                    'type': 'image',
-                    'source': 'pdf',
-                    'multimodal_id': multimodal_id
-                })
+                metadata_to_embed.append(MultimodalMetadata('image', 'pdf', multimodal_id))
                 multimodal_content_store[multimodal_id] = {
                     'type': 'image',
                     'data': enhanced_image_text
@@ -226,22 +529,14 @@ class EnhancedMultimodalProcessor:
                 # 增强表格处理
                 enhanced_table_text = self._enhance_table_description(element_text)
                 texts_to_embed.append(enhanced_table_text)
-                metadata_to_embed.append({
-                    'type': 'table',
-                    'source': 'pdf',
-                    'multimodal_id': multimodal_id
-                })
+                metadata_to_embed.append(MultimodalMetadata('table', 'pdf', multimodal_id))
                 multimodal_content_store[multimodal_id] = {
                     'type': 'table',
                     'data': enhanced_table_text
                 }
             else:
                 texts_to_embed.append(element_text)
-                metadata_to_embed.append({
-                    'type': 'text',
-                    'source': 'pdf',
-                    'multimodal_id': multimodal_id
-                })
+                metadata_to_embed.append(MultimodalMetadata('text', 'pdf', multimodal_id))
         
         return {
             'texts_to_embed': texts_to_embed,
@@ -250,32 +545,188 @@ class EnhancedMultimodalProcessor:
             'processing_method': 'unstructured'
         }
     
-    def _extract_text_from_image(self, img_data: bytes) -> str:
-        """从图像中提取文本"""
+    def _extract_text_from_image(self, pixels: np.ndarray) -> str:
+        """从图像中提取文本 - pixels为 (高, 宽[, 通道数]) 的uint8像素数组"""
         if not self.image_ocr_available:
             return "图像内容 (OCR不可用)"
         
         try:
-            # 将字节数据转换为PIL图像
-            image = Image.open(io.BytesIO(img_data))
+            height, width = pixels.shape[:2]
+            if width < MIN_OCR_IMAGE_SIZE or height < MIN_OCR_IMAGE_SIZE:
+                return NO_TEXT_DETECTED
+            
+            # 快速预筛选，跳过明显不含文字的图像
+            gray = self._to_grayscale(pixels)
+            if _text_likelihood_kernel()(gray) < TEXT_LIKELIHOOD_THRESHOLD:
+                return NO_TEXT_DETECTED
             
-            # 使用OCR提取文本
-            ocr_text = pytesseract.image_to_string(image, lang='chi_sim+eng')
+            image = self._preprocess_for_ocr(gray)
+            
+            # 使用OCR提取文本，优先使用常驻的Tesseract API
+            tess_api = self._get_tess_api()
+            if tess_api is not None:
+                tess_api.SetImage(image)
+                ocr_text = tess_api.GetUTF8Text()
+            else:
+                ocr_text = _lazy('pytesseract').image_to_string(
+                    image, lang=OCR_LANGUAGES, config=self.ocr_config
+                )
             
             if ocr_text.strip():
                 return ocr_text.strip()
             else:
-                return "图像内容 (未检测到文本)"
+                return NO_TEXT_DETECTED
                 
         except Exception as e:
-            print(f"⚠ OCR处理失败: {e}")
+            self.logger.warning(f"OCR处理失败: {e}")
             return "图像内容 (OCR处理失败)"
     
+    @staticmethod
+    def _to_grayscale(pixels: np.ndarray) -> np.ndarray:
+        """将灰度/RGB像素数组（可带alpha通道）转换为连续的灰度数组"""
+        if pixels.ndim == 2:
+            return np.ascontiguousarray(pixels)
+        
+        channels = pixels.shape[2]
+        if channels <= 2:  # 灰度（+alpha）
+            return np.ascontiguousarray(pixels[:, :, 0])
+        
+        rgb = np.ascontiguousarray(pixels[:, :, :3])
+        if _module_available('cv2'):
+            cv2 = _lazy('cv2')
+            return cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        return np.asarray(_lazy('PIL.Image').fromarray(rgb).convert('L'))
+    
+    def _preprocess_for_ocr(self, gray: np.ndarray) -> "Image.Image":
+        """OCR预处理 - 对灰度图自适应二值化，减少Tesseract的版面分析开销"""
+        Image = _lazy('PIL.Image')
+        if not _module_available('cv2'):
+            return Image.fromarray(gray)
+        
+        cv2 = _lazy('cv2')
+        binary = cv2.adaptiveThreshold(
+            gray, 255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+            31, 10
+        )
+        return Image.fromarray(binary)
+    
+    def _get_executors(self) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        """获取 (页面线程池, OCR线程池)，首次使用时创建"""
+        with self._executor_lock:
+            if self._page_executor is None:
+                cpu_count = os.cpu_count() or 1
+                self._page_executor = ThreadPoolExecutor(max_workers=cpu_count, thread_name_prefix='pdf-page')
+                self._ocr_executor = ThreadPoolExecutor(max_workers=cpu_count, thread_name_prefix='pdf-ocr')
+            return self._page_executor, self._ocr_executor
+    
+    def _get_tess_api(self):
+        """获取当前线程的Tesseract API，首次使用时创建"""
+        if not self.tesserocr_available:
+            return None
+        
+        tess_api = getattr(self._tess_local, 'api', None)
+        if tess_api is None:
+            try:
+                psm, oem, variables = self._parse_ocr_config(self.ocr_config)
+                tess_api = _lazy('tesserocr').PyTessBaseAPI(
+                    lang=OCR_LANGUAGES, psm=psm, oem=oem, variables=variables
+                )
+            except RuntimeError as e:
+                print(f"⚠ tesserocr初始化失败，使用pytesseract: {e}")
+                self.tesserocr_available = False
+                self.image_ocr_available = self.pytesseract_available
+                return None
+            
+            self._tess_local.api = tess_api
+            with self._tess_lock:
+                self._tess_apis.append(tess_api)
+        
+        return tess_api
+    
+    @staticmethod
+    def _parse_ocr_config(ocr_config: str) -> Tuple[int, int, Dict[str, str]]:
+        """将pytesseract风格的参数转换为tesserocr的 (psm, oem, variables)"""
+        psm_match = re.search(r'--psm\s+(\d+)', ocr_config)
+        oem_match = re.search(r'--oem\s+(\d+)', ocr_config)
+        psm = int(psm_match.group(1)) if psm_match else 3  # PSM.AUTO
+        oem = int(oem_match.group(1)) if oem_match else 3  # OEM.DEFAULT
+        variables = dict(re.findall(r'-c\s+(\w+)=(\S+)', ocr_config))
+        return psm, oem, variables
+    
+    def close(self):
+        """关闭线程池并释放所有线程创建的Tesseract API"""
+        with self._executor_lock:
+            executors = (self._page_executor, self._ocr_executor)
+            self._page_executor = self._ocr_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        
+        with self._tess_lock:
+            for tess_api in self._tess_apis:
+                tess_api.End()
+            self._tess_apis.clear()
+        self._tess_local = threading.local()
+    
+    def __del__(self):
+        """清理资源"""
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def _extract_all_tables(self, pdf_path: str, doc) -> Optional[Dict[int, List[str]]]:
+        """使用tabula一次性提取全部页面的表格，返回 {页码: [格式化表格, ...]}
+        
+        整个文档只启动一次JVM；tabula或Java不可用时返回None
+        """
+        if not self.table_processing_available or not _java_available():
+            return None
+        
+        # lattice模式依据线条识别表格，没有任何绘图的文档（纯文本、扫描件）无需启动JVM
+        with self._mupdf_lock:
+            has_drawings = any(page.get_cdrawings() for page in doc)
+        if not has_drawings:
+            return {}
+        
+        try:
+            raw_tables = _lazy('tabula').read_pdf(
+                pdf_path,
+                pages='all',
+                multiple_tables=True,
+                lattice=True,
+                output_format='json',
+                silent=True
+            )
+        except Exception as e:
+            print(f"⚠ tabula批量表格提取失败，逐页查找表格: {e}")
+            return None
+        
+        tables_by_page = {}
+        for raw_table in raw_tables:
+            page_number = raw_table.get('page_number')
+            if page_number is None:
+                # 旧版本tabula-java不输出页码，无法对应到页面
+                return None
+            
+            table_data = [[cell.get('text', '') for cell in row] for row in raw_table.get('data', [])]
+            table_text = self._format_table_data(table_data)
+            if table_text:
+                tables_by_page.setdefault(page_number, []).append(table_text)
+        
+        return tables_by_page
+    
     def _extract_tables_from_page(self, page, page_num: int) -> List[str]:
         """从页面提取表格"""
         tables = []
         
         try:
+            # find_tables默认依据矢量线条识别表格，没有任何绘图的页面（纯文本、扫描页）
+            # 不可能找到表格，跳过代价较高的版面分析
+            if not page.get_cdrawings():
+                return tables
+            
             # 获取页面中的表格
             page_tables = page.find_tables()
             
@@ -290,11 +741,11 @@ class EnhancedMultimodalProcessor:
                         tables.append(table_text)
                         
                 except Exception as e:
-                    print(f"⚠ 表格提取失败 (第{page_num}页): {e}")
+                    self.logger.warning(f"表格提取失败 (第{page_num}页): {e}")
                     continue
                     
         except Exception as e:
-            print(f"⚠ 页面表格查找失败 (第{page_num}页): {e}")
+            self.logger.warning(f"页面表格查找失败 (第{page_num}页): {e}")
         
         return tables
     
@@ -304,32 +755,34 @@ class EnhancedMultimodalProcessor:
             return ""
         
         try:
-            # 过滤空行和空列
-            filtered_data = []
-            for row in table_data:
-                if row and any(cell and str(cell).strip() for cell in row):
-                    filtered_row = [str(cell).strip() if cell else "" for cell in row]
-                    filtered_data.append(filtered_row)
+            # 先清理单元格，再过滤空行，每个单元格只转换一次字符串
+            cleaned_rows = (
+                [str(cell).strip() if cell else "" for cell in row]
+                for row in table_data if row
+            )
+            filtered_data = [row for row in cleaned_rows if any(row)]
             
             if not filtered_data:
                 return ""
             
-            # 转换为文本格式
-            table_text = "表格数据:\n"
-            for i, row in enumerate(filtered_data):
-                if i == 0:  # 表头
-                    table_text += "| " + " | ".join(row) + " |\n"
-                    table_text += "|" + "|".join(["-" * (len(cell) + 2) for cell in row]) + "|\n"
-                else:
-                    table_text += "| " + " | ".join(row) + " |\n"
+            # 转换为文本格式，首行为表头
+            header = filtered_data[0]
+            lines = [
+                "表格数据:",
+                "| " + " | ".join(header) + " |",
+                "|" + "|".join("-" * (len(cell) + 2) for cell in header) + "|"
+            ]
+            lines.extend("| " + " | ".join(row) + " |" for row in filtered_data[1:])
             
-            return table_text
+            return "\n".join(lines) + "\n"
             
         except Exception as e:
-            print(f"⚠ 表格格式化失败: {e}")
+            self.logger.warning(f"表格格式化失败: {e}")
             return "表格内容 (格式化失败)"
     
-    def _enhance_image_description(self, original_text: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _enhance_image_description(original_text: str) -> str:
         """增强图像描述"""
         if not original_text or len(original_text) < 20:
             return "图像内容: 包含图形或图表信息"
@@ -338,17 +791,15 @@ class EnhancedMultimodalProcessor:
         enhanced = f"图像内容: {original_text}"
         
         # 检测可能的图像类型
-        text_lower = original_text.lower()
-        if any(word in text_lower for word in ['chart', 'graph', '图表', '图形']):
-            enhanced += " [类型: 图表/图形]"
-        elif any(word in text_lower for word in ['diagram', 'flow', '流程', '示意']):
-            enhanced += " [类型: 流程图/示意图]"
-        elif any(word in text_lower for word in ['photo', 'picture', '照片', '图片']):
-            enhanced += " [类型: 照片/图片]"
+        type_label = _IMAGE_TYPE_CLASSIFIER.classify(original_text.lower())
+        if type_label:
+            enhanced += type_label
         
         return enhanced
     
-    def _enhance_table_description(self, original_text: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _enhance_table_description(original_text: str) -> str:
         """增强表格描述"""
         if not original_text:
             return "表格内容: 数据表格"
@@ -356,30 +807,23 @@ class EnhancedMultimodalProcessor:
         enhanced = f"表格内容: {original_text}"
         
         # 分析表格特征
-        lines = original_text.split('\n')
-        row_count = len([line for line in lines if line.strip()])
+        row_count = sum(1 for line in original_text.split('\n') if line.strip())
         
         if row_count > 0:
             enhanced += f" [行数: {row_count}]"
         
         # 检测数据类型
-        text_lower = original_text.lower()
-        if any(word in text_lower for word in ['数据', 'data', '统计', 'statistics']):
-            enhanced += " [类型: 数据统计表]"
-        elif any(word in text_lower for word in ['比较', 'comparison', '对比']):
-            enhanced += " [类型: 比较表]"
+        type_label = _TABLE_TYPE_CLASSIFIER.classify(original_text.lower())
+        if type_label:
+            enhanced += type_label
         
         return enhanced
     
-    def get_multimodal_statistics(self, metadata_list: List[Dict]) -> Dict[str, int]:
+    def get_multimodal_statistics(self, metadata_list: List[Dict[str, Any]]) -> Dict[str, int]:
         """获取多模态内容统计"""
-        stats = {'text': 0, 'image': 0, 'table': 0, 'other': 0}
-        
-        for meta in metadata_list:
-            content_type = meta.get('type', 'other')
-            if content_type in stats:
-                stats[content_type] += 1
-            else:
-                stats['other'] += 1
+        counts = Counter(meta.get('type', 'other') for meta in metadata_list)
+        stats = {content_type: counts.pop(content_type, 0) for content_type in ('text', 'image', 'table')}
+        # 未知类型一并计入other
+        stats['other'] = sum(counts.values())
         
         return stats
\ No newline at end of file
@@ -2,43 +2,350 @@
 增强的用户界面模块 - 改进交互体验和错误处理
 """
 
+import io
 import os
+import re
 import sys
-from typing import Dict, Any, List, Optional, Tuple
+import functools
+import importlib
+import importlib.util
+import dataclasses
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Callable, Union, Final
 from datetime import datetime
 import json
 
-try:
-    from rich.console import Console
-    from rich.table import Table
-    from rich.panel import Panel
-    from rich.progress import Progress, SpinnerColumn, TextColumn
-    from rich.prompt import Prompt, Confirm
-    from rich.text import Text
-    from rich.layout import Layout
-    from rich.live import Live
-    RICH_AVAILABLE = True
-except ImportError:
-    print("⚠ rich库未安装，使用基础界面")
-    RICH_AVAILABLE = False
+def _json_default(obj):
+    """序列化numpy标量/数组、dataclass实例等JSON不支持的类型"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
 
+# orjson直接输出bytes，保存JSON Lines时无需再经过文本编码
 try:
-    import colorama
-    from colorama import Fore, Back, Style
-    colorama.init()
-    COLORAMA_AVAILABLE = True
+    import orjson
+    
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(
+            obj, default=_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
 except ImportError:
-    COLORAMA_AVAILABLE = False
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+# rich和colorama在首次创建界面时才导入，只做查询的脚本无需承担导入开销
+RICH_AVAILABLE = importlib.util.find_spec('rich') is not None
+COLORAMA_AVAILABLE = importlib.util.find_spec('colorama') is not None
+
+_LAZY_IMPORTS = {
+    'Console': 'rich.console',
+    'Group': 'rich.console',
+    'Table': 'rich.table',
+    'Panel': 'rich.panel',
+    'Prompt': 'rich.prompt',
+    'Confirm': 'rich.prompt',
+    'Fore': 'colorama',
+    'Style': 'colorama',
+}
+
+def __getattr__(name: str):
+    """按需导入rich/colorama组件，并缓存到模块全局变量中"""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def _import_lazy(*names: str):
+    """导入指定组件，使类方法可以直接按全局名称使用"""
+    for name in names:
+        if name not in globals():
+            __getattr__(name)
+
+@functools.cache
+def _init_colorama():
+    """初始化colorama（只执行一次，避免重复包装stdout）"""
+    importlib.import_module('colorama').init()
+
+# 分隔线
+_EQ80 = "=" * 80
+_EQ60 = "=" * 60
+_EQ50 = "=" * 50
+_DASH60 = "-" * 60
+_DASH50 = "-" * 50
+
+# 基础界面性能摘要的输出模板
+_PERF_SUMMARY_TEMPLATE = "\n".join((
+    "\n📊 性能摘要:",
+    _DASH50,
+    "总操作数: {total_operations}",
+    "整体成功率: {overall_success_rate:.1%}",
+    "总耗时: {total_duration:.2f}秒",
+    "平均耗时: {avg_duration:.2f}秒",
+    "平均内存使用: {avg_memory_usage:.1f}MB",
+))
+_PERF_BREAKDOWN_HEADER = f"\n操作详情:\n{_DASH50}"
+_PERF_OPERATION_TEMPLATE = "\n".join((
+    "{op_name}:",
+    "  调用次数: {count}",
+    "  成功率: {success_rate:.1%}",
+    "  平均耗时: {avg_duration:.2f}秒",
+    "  平均内存: {avg_memory:.1f}MB",
+))
+
+_WELCOME_TEXT = """
+🤖 交互式多模态RAG系统 v2.0
+
+✨ 新功能特性:
+• 🔧 增强的CAMEL框架集成和稳定性改进
+• 🖼️ 改进的多模态支持 (图像OCR + 表格提取)
+• 🌐 真实网页研究和内容分析
+• ⚡ 性能监控和优化
+• 🎨 增强的用户界面体验
+
+🚀 支持的检索模式:
+• 快速检索: 基础向量检索
+• 深度检索: 查询重写 + HyDE + RRF融合
+• 主题检索: PDF + 网页内容综合分析
+        """
+
+@functools.cache
+def _welcome_panel():
+    """欢迎面板内容固定，只构建一次"""
+    return Panel(
+        _WELCOME_TEXT,
+        title="🎯 系统启动",
+        border_style="blue",
+        padding=(1, 2)
+    )
+
+@functools.cache
+def _basic_welcome_banner(use_colorama: bool) -> str:
+    """基础界面的欢迎信息，拼接为一个字符串后缓存"""
+    if use_colorama:
+        lines = [
+            f"{Fore.CYAN}{_EQ60}",
+            f"{Fore.YELLOW}🤖 交互式多模态RAG系统 v2.0",
+            f"{Fore.CYAN}{_EQ60}",
+            f"{Fore.GREEN}✨ 新功能特性:",
+            f"{Fore.WHITE}• 增强的CAMEL框架集成和稳定性改进",
+            "• 改进的多模态支持 (图像OCR + 表格提取)",
+            "• 真实网页研究和内容分析",
+            "• 性能监控和优化",
+            "• 增强的用户界面体验",
+            f"{Style.RESET_ALL}",
+        ]
+    else:
+        lines = [
+            _EQ60,
+            "🤖 交互式多模态RAG系统 v2.0",
+            _EQ60,
+            "✨ 新功能特性:",
+            "• 增强的CAMEL框架集成和稳定性改进",
+            "• 改进的多模态支持 (图像OCR + 表格提取)",
+            "• 真实网页研究和内容分析",
+            "• 性能监控和优化",
+            "• 增强的用户界面体验",
+        ]
+    return "\n".join(lines)
+
+# 文档序号列表，如 "1,3, 5"（允许末尾逗号）
+_INDICES_PATTERN = re.compile(r'\s*\d+(?:\s*,\s*\d+)*\s*,?\s*')
+
+def _prompt(text: str) -> str:
+    """基础界面的输入提示 - 先输出积压的内容再读取输入
+    
+    交互终端使用input()保留行编辑功能；管道输入直接读取stdin，EOF时同样抛出EOFError
+    """
+    sys.stdout.flush()
+    if sys.stdin.isatty():
+        return input(text)
+    
+    sys.stdout.write(text)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip('\n')
+
+@functools.lru_cache(maxsize=32)
+def _compile_validator(pattern: str) -> re.Pattern:
+    """编译输入验证用的正则，相同的正则字符串只编译一次"""
+    return re.compile(pattern)
+
+# 支持的文档格式
+SUPPORTED_DOC_EXTS = frozenset({'.pdf', '.docx', '.doc', '.txt', '.md', '.csv', '.xlsx', '.xls', '.pptx', '.json'})
+
+def _list_supported_files(dir_path: str) -> List[str]:
+    """列出目录中支持格式的文档 - 只遍历一次目录"""
+    with os.scandir(dir_path) as entries:
+        files = [
+            entry.path for entry in entries
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in SUPPORTED_DOC_EXTS
+        ]
+    return sorted(files)
+
+# 默认示例PDF (CAMEL论文)
+DEFAULT_PDF_URL: Final = "https://arxiv.org/pdf/2303.17760.pdf"
+
+# 菜单选项 -> 返回值
+_RETRIEVAL_MODES: Final = {"1": "快速检索", "2": "深度检索", "3": "主题检索"}
+_DOCUMENT_ACTIONS: Final = {"1": "add", "2": "remove", "3": "list", "4": "cache", "5": "back"}
+
+# 固定菜单表格: 名称 -> ((列名, 样式, 宽度), ...), ((单元格, ...), ...)
+_MENU_TABLES = {
+    'pdf_source': (
+        (("选项", "cyan", 8), ("描述", "white", None)),
+        (("1", "在线PDF (输入URL)"),
+         ("2", "本地PDF (输入文件路径)"),
+         ("3", "使用默认示例PDF (CAMEL论文)")),
+    ),
+    'retrieval_mode': (
+        (("模式", "cyan", 12), ("描述", "white", None), ("特点", "yellow", None)),
+        (("1. 快速检索", "基础向量检索", "速度快，适合简单查询"),
+         ("2. 深度检索", "查询重写+HyDE+RRF", "准确度高，适合复杂查询"),
+         ("3. 主题检索", "PDF+网页综合分析", "信息全面，适合研究性查询")),
+    ),
+    'document_source': (
+        (("选项", "cyan", 8), ("描述", "white", None)),
+        (("1", "在线文档 (输入URL)"),
+         ("2", "本地文档 (输入文件路径)"),
+         ("3", "批量本地文档 (输入目录路径)"),
+         ("4", "使用默认示例PDF")),
+    ),
+    'document_management': (
+        (("操作", "cyan", 12), ("描述", "white", None)),
+        (("1. add", "添加新文档到知识库"),
+         ("2. remove", "从知识库中移除文档"),
+         ("3. list", "列出知识库中的所有文档"),
+         ("4. cache", "缓存管理"),
+         ("5. back", "返回主菜单")),
+    ),
+}
+
+# 基础界面确认提示接受的回答
+_YES: Final = frozenset({'y', 'yes', '是'})
+_NO: Final = frozenset({'n', 'no', '否'})
+
+# Rich菜单的有效选项，与菜单表格的行一一对应
+_MENU_CHOICES: Final = {
+    'pdf_source': ["1", "2", "3"],
+    'retrieval_mode': list(_RETRIEVAL_MODES),
+    'document_source': ["1", "2", "3", "4"],
+    'document_management': list(_DOCUMENT_ACTIONS),
+}
+
+# 基础界面的固定菜单文本，预先拼接为完整字符串
+_BASIC_MENUS = {
+    'pdf_source': "\n".join((
+        "\n📚 PDF知识库设置",
+        _EQ50,
+        "1. 在线PDF (输入URL)",
+        "2. 本地PDF (输入文件路径)",
+        "3. 使用默认示例PDF (CAMEL论文)",
+    )),
+    'retrieval_mode': "\n".join((
+        "\n🔍 选择检索模式:",
+        "1. 快速检索 (基础向量检索)",
+        "2. 深度检索 (查询重写+HyDE+RRF)",
+        "3. 主题检索 (PDF+网页综合分析)",
+    )),
+    'document_source': "\n".join((
+        "\n📚 文档知识库设置",
+        _EQ50,
+        "1. 在线文档 (输入URL)",
+        "2. 本地文档 (输入文件路径)",
+        "3. 批量本地文档 (输入目录路径)",
+        "4. 使用默认示例PDF",
+    )),
+    'document_management': "\n".join((
+        "\n📁 文档管理",
+        _EQ50,
+        "1. 添加新文档到知识库",
+        "2. 从知识库中移除文档",
+        "3. 列出知识库中的所有文档",
+        "4. 缓存管理",
+        "5. 返回主菜单",
+    )),
+}
+
+@functools.cache
+def _menu_table(name: str):
+    """构建固定菜单表格 - 表格构建后不再修改，可重复输出"""
+    columns, rows = _MENU_TABLES[name]
+    table = Table(show_header=True, header_style="bold magenta")
+    for header, style, width in columns:
+        table.add_column(header, style=style, width=width)
+    for row in rows:
+        table.add_row(*row)
+    return table
+
+_STATUS_OK = "✅ 正常"
+_STATUS_UNAVAILABLE = "❌ 不可用"
+
+def _normalize_status(status_info: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    """将系统状态统一为 (组件, 状态, 详情) 列表 - 组件信息可以是布尔值或含available/details的字典"""
+    rows = []
+    for component, info in status_info.items():
+        if isinstance(info, dict):
+            available, details = info.get('available', True), info.get('details', '')
+        else:
+            available, details = info, ""
+        rows.append((component, _STATUS_OK if available else _STATUS_UNAVAILABLE, details))
+    return rows
+
+@functools.cache
+def _shared_console():
+    """所有界面实例共享一个Rich Console，终端能力只检测一次"""
+    return Console()
+
+def reset_console():
+    """丢弃共享的Console，下次创建界面时重新检测终端（如终端环境变化或测试隔离）"""
+    _shared_console.cache_clear()
 
 class EnhancedUserInterface:
     """增强的用户界面"""
     
+    _ANSI_YELLOW = "\x1b[33m"
+    _ANSI_RESET = "\x1b[0m"
+    
     def __init__(self, use_rich: bool = True):
+        if use_rich and not RICH_AVAILABLE:
+            print("⚠ rich库未安装，使用基础界面")
         self.use_rich = use_rich and RICH_AVAILABLE
         self.use_colorama = COLORAMA_AVAILABLE
         
+        # batch()期间缓存的提示信息
+        self._msg_buffer = []
+        self._buffered = False
+        
         if self.use_rich:
-            self.console = Console()
+            _import_lazy('Console', 'Group', 'Table', 'Panel', 'Prompt', 'Confirm')
+        # 基础界面提示信息的颜色模板，按colorama颜色名预先生成
+        self._colorama_formats = {}
+        if self.use_colorama:
+            _import_lazy('Fore', 'Style')
+            _init_colorama()
+            self._colorama_formats = {
+                color: f"{getattr(Fore, color)}{{}}{Style.RESET_ALL}"
+                for color in ('GREEN', 'YELLOW', 'RED')
+            }
+        
+        # Rich直接输出到支持ANSI的终端时，简单提示可以绕过Rich渲染
+        self._ansi_fast_path = False
+        
+        if self.use_rich:
+            self.console = _shared_console()
+            self._ansi_fast_path = (
+                self.console.is_terminal
+                and self.console.file is sys.stdout
+                and self.console.color_system is not None
+                and not self.console.legacy_windows
+            )
             print("✓ 使用Rich增强界面")
         elif self.use_colorama:
             print("✓ 使用Colorama彩色界面")
@@ -54,53 +361,11 @@ class EnhancedUserInterface:
     
     def _print_rich_welcome(self):
         """Rich版本的欢迎信息"""
-        welcome_text = """
-🤖 交互式多模态RAG系统 v2.0
-
-✨ 新功能特性:
-• 🔧 增强的CAMEL框架集成和稳定性改进
-• 🖼️ 改进的多模态支持 (图像OCR + 表格提取)
-• 🌐 真实网页研究和内容分析
-• ⚡ 性能监控和优化
-• 🎨 增强的用户界面体验
-
-🚀 支持的检索模式:
-• 快速检索: 基础向量检索
-• 深度检索: 查询重写 + HyDE + RRF融合
-• 主题检索: PDF + 网页内容综合分析
-        """
-        
-        panel = Panel(
-            welcome_text,
-            title="🎯 系统启动",
-            border_style="blue",
-            padding=(1, 2)
-        )
-        self.console.print(panel)
+        self.console.print(_welcome_panel())
     
     def _print_basic_welcome(self):
         """基础版本的欢迎信息"""
-        if self.use_colorama:
-            print(f"{Fore.CYAN}{'='*60}")
-            print(f"{Fore.YELLOW}🤖 交互式多模态RAG系统 v2.0")
-            print(f"{Fore.CYAN}{'='*60}")
-            print(f"{Fore.GREEN}✨ 新功能特性:")
-            print(f"{Fore.WHITE}• 增强的CAMEL框架集成和稳定性改进")
-            print(f"• 改进的多模态支持 (图像OCR + 表格提取)")
-            print(f"• 真实网页研究和内容分析")
-            print(f"• 性能监控和优化")
-            print(f"• 增强的用户界面体验")
-            print(f"{Style.RESET_ALL}")
-        else:
-            print("="*60)
-            print("🤖 交互式多模态RAG系统 v2.0")
-            print("="*60)
-            print("✨ 新功能特性:")
-            print("• 增强的CAMEL框架集成和稳定性改进")
-            print("• 改进的多模态支持 (图像OCR + 表格提取)")
-            print("• 真实网页研究和内容分析")
-            print("• 性能监控和优化")
-            print("• 增强的用户界面体验")
+        print(_basic_welcome_banner(self.use_colorama))
     
     def get_pdf_source(self) -> Tuple[str, str]:
         """获取PDF来源"""
@@ -113,16 +378,9 @@ class EnhancedUserInterface:
         """Rich版本的PDF来源选择"""
         self.console.print("\n📚 PDF知识库设置", style="bold blue")
         
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("选项", style="cyan", width=8)
-        table.add_column("描述", style="white")
-        table.add_row("1", "在线PDF (输入URL)")
-        table.add_row("2", "本地PDF (输入文件路径)")
-        table.add_row("3", "使用默认示例PDF (CAMEL论文)")
+        self.console.print(_menu_table('pdf_source'))
         
-        self.console.print(table)
-        
-        choice = Prompt.ask("\n请选择PDF来源", choices=["1", "2", "3"], default="3")
+        choice = Prompt.ask("\n请选择PDF来源", choices=_MENU_CHOICES['pdf_source'], default="3")
         
         if choice == "1":
             url = Prompt.ask("请输入PDF的URL")
@@ -131,33 +389,29 @@ class EnhancedUserInterface:
             path = Prompt.ask("请输入PDF文件路径")
             return "path", path
         else:
-            return "default", "https://arxiv.org/pdf/2303.17760.pdf"
+            return "default", DEFAULT_PDF_URL
     
     def _get_pdf_source_basic(self) -> Tuple[str, str]:
         """基础版本的PDF来源选择"""
-        print("\n📚 PDF知识库设置")
-        print("="*50)
-        print("1. 在线PDF (输入URL)")
-        print("2. 本地PDF (输入文件路径)")
-        print("3. 使用默认示例PDF (CAMEL论文)")
+        print(_BASIC_MENUS['pdf_source'])
         
-        choice = input("\n请选择PDF来源 (1-3, 默认3): ").strip() or "3"
+        choice = _prompt("\n请选择PDF来源 (1-3, 默认3): ").strip() or "3"
         
         if choice == "1":
-            url = input("请输入PDF的URL: ").strip()
+            url = _prompt("请输入PDF的URL: ").strip()
             return "url", url
         elif choice == "2":
-            path = input("请输入PDF文件路径: ").strip()
+            path = _prompt("请输入PDF文件路径: ").strip()
             return "path", path
         else:
-            return "default", "https://arxiv.org/pdf/2303.17760.pdf"
+            return "default", DEFAULT_PDF_URL
     
     def get_user_query(self) -> str:
         """获取用户查询"""
         if self.use_rich:
             return Prompt.ask("\n💭 请输入您的问题", default="")
         else:
-            return input("\n💭 请输入您的问题: ").strip()
+            return _prompt("\n💭 请输入您的问题: ").strip()
     
     def get_retrieval_mode(self) -> str:
         """获取检索模式"""
@@ -170,82 +424,81 @@ class EnhancedUserInterface:
         """Rich版本的检索模式选择"""
         self.console.print("\n🔍 选择检索模式", style="bold green")
         
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("模式", style="cyan", width=12)
-        table.add_column("描述", style="white")
-        table.add_column("特点", style="yellow")
-        
-        table.add_row(
-            "1. 快速检索", 
-            "基础向量检索", 
-            "速度快，适合简单查询"
-        )
-        table.add_row(
-            "2. 深度检索", 
-            "查询重写+HyDE+RRF", 
-            "准确度高，适合复杂查询"
-        )
-        table.add_row(
-            "3. 主题检索", 
-            "PDF+网页综合分析", 
-            "信息全面，适合研究性查询"
-        )
-        
-        self.console.print(table)
+        self.console.print(_menu_table('retrieval_mode'))
         
-        choice = Prompt.ask("请选择检索模式", choices=["1", "2", "3"], default="1")
+        choice = Prompt.ask("请选择检索模式", choices=_MENU_CHOICES['retrieval_mode'], default="1")
         
-        mode_map = {"1": "快速检索", "2": "深度检索", "3": "主题检索"}
-        return mode_map[choice]
+        return _RETRIEVAL_MODES[choice]
     
     def _get_retrieval_mode_basic(self) -> str:
         """基础版本的检索模式选择"""
-        print("\n🔍 选择检索模式:")
-        print("1. 快速检索 (基础向量检索)")
-        print("2. 深度检索 (查询重写+HyDE+RRF)")
-        print("3. 主题检索 (PDF+网页综合分析)")
+        print(_BASIC_MENUS['retrieval_mode'])
         
-        choice = input("请选择模式 (1-3, 默认1): ").strip() or "1"
+        choice = _prompt("请选择模式 (1-3, 默认1): ").strip() or "1"
         
-        mode_map = {"1": "快速检索", "2": "深度检索", "3": "主题检索"}
-        return mode_map.get(choice, "快速检索")
+        return _RETRIEVAL_MODES.get(choice, "快速检索")
     
     def display_loading(self, message: str):
         """显示加载信息"""
-        if self.use_rich:
-            self.console.print(f"⏳ {message}", style="yellow")
-        else:
-            print(f"⏳ {message}")
+        if self._ansi_fast_path and not self._buffered and len(message) < 200 and '[' not in message:
+            # 不含标记的短消息直接写入终端，跳过Rich的样式解析
+            sys.stdout.write(f"{self._ANSI_YELLOW}⏳ {message}{self._ANSI_RESET}\n")
+            sys.stdout.flush()
+            return
+        self._show_message(f"⏳ {message}", "yellow")
     
     def display_success(self, message: str):
         """显示成功信息"""
-        if self.use_rich:
-            self.console.print(f"✅ {message}", style="green")
-        else:
-            if self.use_colorama:
-                print(f"{Fore.GREEN}✅ {message}{Style.RESET_ALL}")
-            else:
-                print(f"✅ {message}")
+        self._show_message(f"✅ {message}", "green", "GREEN")
     
     def display_warning(self, message: str):
         """显示警告信息"""
-        if self.use_rich:
-            self.console.print(f"⚠️ {message}", style="yellow")
-        else:
-            if self.use_colorama:
-                print(f"{Fore.YELLOW}⚠️ {message}{Style.RESET_ALL}")
-            else:
-                print(f"⚠️ {message}")
+        self._show_message(f"⚠️ {message}", "yellow", "YELLOW")
     
     def display_error(self, message: str):
         """显示错误信息"""
-        if self.use_rich:
-            self.console.print(f"❌ {message}", style="red")
+        self._show_message(f"❌ {message}", "red", "RED")
+    
+    @contextmanager
+    def batch(self):
+        """在with块内缓存display_*提示信息，退出时一次性输出"""
+        if self._buffered:
+            # 嵌套使用时由最外层统一输出
+            yield
+            return
+        
+        self._buffered = True
+        try:
+            yield
+        finally:
+            self._buffered = False
+            messages, self._msg_buffer = self._msg_buffer, []
+            if messages:
+                self._render_messages(messages)
+    
+    def _show_message(self, text: str, style: str, color: Optional[str] = None):
+        """输出一条提示信息 - style为Rich样式，color为基础界面的colorama颜色名"""
+        if self._buffered:
+            self._msg_buffer.append((text, style, color))
         else:
-            if self.use_colorama:
-                print(f"{Fore.RED}❌ {message}{Style.RESET_ALL}")
+            self._render_messages([(text, style, color)])
+    
+    def _render_messages(self, messages: List[Tuple[str, str, Optional[str]]]):
+        """输出一组提示信息"""
+        if self.use_rich:
+            if len(messages) == 1:
+                text, style, _ = messages[0]
+                self.console.print(text, style=style)
             else:
-                print(f"❌ {message}")
+                self.console.print(Group(*(
+                    self.console.render_str(text, style=style) for text, style, _ in messages
+                )))
+        else:
+            formats = self._colorama_formats
+            print("\n".join(
+                formats[color].format(text) if color in formats else text
+                for text, _, color in messages
+            ))
     
     def display_results(self, results: Dict[str, Any]):
         """显示查询结果"""
@@ -259,9 +512,8 @@ class EnhancedUserInterface:
             self._display_results_basic(results)
     
     def _display_results_rich(self, results: Dict[str, Any]):
-        """Rich版本的结果显示"""
-        # 创建结果面板
-        self.console.print("\n" + "="*80)
+        """Rich版本的结果显示 - 收集全部面板后一次性输出"""
+        renderables = ["\n" + _EQ80]
         
         # 查询信息
         query_info = f"🔍 查询: {results.get('original_query', 'N/A')}\n"
@@ -270,84 +522,82 @@ class EnhancedUserInterface:
         if results.get('rewritten_query'):
             query_info += f"\n📝 重写: {results['rewritten_query']}"
         
-        query_panel = Panel(query_info, title="查询信息", border_style="blue")
-        self.console.print(query_panel)
+        renderables.append(Panel(query_info, title="查询信息", border_style="blue"))
         
         # 检索文档
         retrieved_docs = results.get('retrieved_docs', [])
         if retrieved_docs:
-            self.console.print(f"\n📄 检索到的文档 (共{len(retrieved_docs)}个):")
+            renderables.append(f"\n📄 检索到的文档 (共{len(retrieved_docs)}个):")
             
             for i, doc in enumerate(retrieved_docs, 1):
                 score = doc.get('rrf_score', doc.get('similarity', 0))
-                text_preview = doc.get('text', '')[:200] + "..." if len(doc.get('text', '')) > 200 else doc.get('text', '')
+                text = doc.get('text', '')
+                text_preview = text[:200] + "..." if len(text) > 200 else text
                 
                 doc_info = f"相关度分数: {score:.4f}\n内容预览: {text_preview}"
-                doc_panel = Panel(doc_info, title=f"文档 {i}", border_style="cyan")
-                self.console.print(doc_panel)
+                renderables.append(Panel(doc_info, title=f"文档 {i}", border_style="cyan"))
         
         # 最终答案
         final_answer = results.get('final_answer', 'N/A')
-        answer_panel = Panel(final_answer, title="💡 生成答案", border_style="green")
-        self.console.print(answer_panel)
+        renderables.append(Panel(final_answer, title="💡 生成答案", border_style="green"))
         
-        self.console.print("="*80)
+        renderables.append(_EQ80)
+        self.console.print(Group(*renderables))
     
     def _display_results_basic(self, results: Dict[str, Any]):
-        """基础版本的结果显示"""
-        print("\n" + "="*80)
-        print("📊 查询结果")
-        print("="*80)
+        """基础版本的结果显示 - 写入缓冲区后一次性输出"""
+        buf = io.StringIO()
+        w = buf.write
         
-        print(f"🔍 原始查询: {results.get('original_query', 'N/A')}")
+        w(f"\n{_EQ80}\n📊 查询结果\n{_EQ80}\n")
+        
+        w(f"🔍 原始查询: {results.get('original_query', 'N/A')}\n")
         if results.get('rewritten_query'):
-            print(f"📝 重写查询: {results['rewritten_query']}")
-        print(f"🔧 检索方法: {results.get('retrieval_method', 'N/A')}")
+            w(f"📝 重写查询: {results['rewritten_query']}\n")
+        w(f"🔧 检索方法: {results.get('retrieval_method', 'N/A')}\n")
         
         # 显示检索文档
         retrieved_docs = results.get('retrieved_docs', [])
         if retrieved_docs:
-            print(f"\n📄 检索到的文档 (共{len(retrieved_docs)}个):")
-            print("-" * 60)
+            w(f"\n📄 检索到的文档 (共{len(retrieved_docs)}个):\n{_DASH60}\n")
             
             for i, doc in enumerate(retrieved_docs, 1):
                 score = doc.get('rrf_score', doc.get('similarity', 0))
-                text_preview = doc.get('text', '')[:200] + "..." if len(doc.get('text', '')) > 200 else doc.get('text', '')
+                text = doc.get('text', '')
+                text_preview = text[:200] + "..." if len(text) > 200 else text
                 
                 if self.use_colorama:
-                    print(f"{Fore.CYAN}文档 {i}:{Style.RESET_ALL}")
-                    print(f"{Fore.YELLOW}相关度分数: {score:.4f}{Style.RESET_ALL}")
-                    print(f"内容预览: {text_preview}")
+                    w(f"{Fore.CYAN}文档 {i}:{Style.RESET_ALL}\n")
+                    w(f"{Fore.YELLOW}相关度分数: {score:.4f}{Style.RESET_ALL}\n")
                 else:
-                    print(f"文档 {i}:")
-                    print(f"相关度分数: {score:.4f}")
-                    print(f"内容预览: {text_preview}")
-                print("-" * 60)
+                    w(f"文档 {i}:\n")
+                    w(f"相关度分数: {score:.4f}\n")
+                w(f"内容预览: {text_preview}\n{_DASH60}\n")
         
         # 显示最终答案
         final_answer = results.get('final_answer', 'N/A')
         if self.use_colorama:
-            print(f"\n{Fore.GREEN}💡 生成答案:{Style.RESET_ALL}")
+            w(f"\n{Fore.GREEN}💡 生成答案:{Style.RESET_ALL}\n")
         else:
-            print(f"\n💡 生成答案:")
-        print(final_answer)
-        print("="*80)
+            w(f"\n💡 生成答案:\n")
+        w(f"{final_answer}\n{_EQ80}\n")
+        
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
     
     def ask_save_results(self) -> bool:
         """询问是否保存结果"""
         if self.use_rich:
             return Confirm.ask("💾 是否保存结果到文件?", default=False)
         else:
-            choice = input("💾 是否保存结果到文件? (y/n, 默认n): ").strip().lower()
-            return choice == 'y'
+            return _prompt("💾 是否保存结果到文件? (y/n, 默认n): ").strip().lower() in _YES
     
     def ask_continue(self) -> bool:
         """询问是否继续"""
         if self.use_rich:
             return Confirm.ask("🔄 是否继续查询?", default=True)
         else:
-            choice = input("🔄 是否继续查询? (y/n, 默认y): ").strip().lower()
-            return choice != 'n'
+            return _prompt("🔄 是否继续查询? (y/n, 默认y): ").strip().lower() not in _NO
     
     def display_system_status(self, status_info: Dict[str, Any]):
         """显示系统状态"""
@@ -363,39 +613,24 @@ class EnhancedUserInterface:
         table.add_column("状态", style="white", width=15)
         table.add_column("详情", style="yellow")
         
-        for component, info in status_info.items():
-            if isinstance(info, dict):
-                status = "✅ 正常" if info.get('available', True) else "❌ 不可用"
-                details = info.get('details', '')
-            else:
-                status = "✅ 正常" if info else "❌ 不可用"
-                details = ""
-            
-            table.add_row(component, status, details)
+        for row in _normalize_status(status_info):
+            table.add_row(*row)
         
         self.console.print(table)
     
     def _display_system_status_basic(self, status_info: Dict[str, Any]):
         """基础版本的系统状态显示"""
-        print("\n🔧 系统状态:")
-        print("-" * 50)
+        lines = ["\n🔧 系统状态:", _DASH50]
         
-        for component, info in status_info.items():
-            if isinstance(info, dict):
-                status = "✅ 正常" if info.get('available', True) else "❌ 不可用"
-                details = info.get('details', '')
-            else:
-                status = "✅ 正常" if info else "❌ 不可用"
-                details = ""
-            
+        for component, status, details in _normalize_status(status_info):
             if self.use_colorama:
-                print(f"{Fore.CYAN}{component}:{Style.RESET_ALL} {status}")
-                if details:
-                    print(f"  {details}")
+                lines.append(f"{Fore.CYAN}{component}:{Style.RESET_ALL} {status}")
             else:
-                print(f"{component}: {status}")
-                if details:
-                    print(f"  {details}")
+                lines.append(f"{component}: {status}")
+            if details:
+                lines.append(f"  {details}")
+        
+        print("\n".join(lines))
     
     def display_performance_summary(self, performance_data: Dict[str, Any]):
         """显示性能摘要"""
@@ -420,27 +655,33 @@ class EnhancedUserInterface:
         """
         
         summary_panel = Panel(summary_text.strip(), title="📊 性能摘要", border_style="green")
-        self.console.print(summary_panel)
         
         # 操作详情表格
-        if performance_data.get('operations_breakdown'):
-            table = Table(title="操作详情", show_header=True, header_style="bold magenta")
-            table.add_column("操作", style="cyan")
-            table.add_column("次数", style="white")
-            table.add_column("成功率", style="green")
-            table.add_column("平均耗时", style="yellow")
-            table.add_column("平均内存", style="blue")
-            
-            for op_name, op_data in performance_data['operations_breakdown'].items():
-                table.add_row(
-                    op_name,
-                    str(op_data['count']),
-                    f"{op_data['success_rate']:.1%}",
-                    f"{op_data['avg_duration']:.2f}s",
-                    f"{op_data['avg_memory']:.1f}MB"
-                )
-            
-            self.console.print(table)
+        operations = performance_data.get('operations_breakdown')
+        if not operations:
+            self.console.print(summary_panel)
+            return
+        
+        table = Table(title="操作详情", show_header=True, header_style="bold magenta")
+        table.add_column("操作", style="cyan")
+        table.add_column("次数", style="white")
+        table.add_column("成功率", style="green")
+        table.add_column("平均耗时", style="yellow")
+        table.add_column("平均内存", style="blue")
+        
+        rows = [
+            (op_name,
+             str(op_data['count']),
+             f"{op_data['success_rate']:.1%}",
+             f"{op_data['avg_duration']:.2f}s",
+             f"{op_data['avg_memory']:.1f}MB")
+            for op_name, op_data in operations.items()
+        ]
+        for row in rows:
+            table.add_row(*row)
+        
+        # 摘要面板和详情表格一次输出
+        self.console.print(Group(summary_panel, table))
     
     def _display_performance_summary_basic(self, performance_data: Dict[str, Any]):
         """基础版本的性能摘要显示"""
@@ -448,60 +689,68 @@ class EnhancedUserInterface:
             print(f"📊 {performance_data['message']}")
             return
         
-        print("\n📊 性能摘要:")
-        print("-" * 50)
-        print(f"总操作数: {performance_data['total_operations']}")
-        print(f"整体成功率: {performance_data['overall_success_rate']:.1%}")
-        print(f"总耗时: {performance_data['total_duration']:.2f}秒")
-        print(f"平均耗时: {performance_data['avg_duration']:.2f}秒")
-        print(f"平均内存使用: {performance_data['avg_memory_usage']:.1f}MB")
+        chunks = [_PERF_SUMMARY_TEMPLATE.format_map(performance_data)]
         
         if performance_data.get('operations_breakdown'):
-            print(f"\n操作详情:")
-            print("-" * 50)
-            for op_name, op_data in performance_data['operations_breakdown'].items():
-                print(f"{op_name}:")
-                print(f"  调用次数: {op_data['count']}")
-                print(f"  成功率: {op_data['success_rate']:.1%}")
-                print(f"  平均耗时: {op_data['avg_duration']:.2f}秒")
-                print(f"  平均内存: {op_data['avg_memory']:.1f}MB")
-    
-    def save_results_to_file(self, results: Dict[str, Any], filename: str = None) -> bool:
-        """保存结果到文件"""
+            chunks.append(_PERF_BREAKDOWN_HEADER)
+            chunks.extend(
+                _PERF_OPERATION_TEMPLATE.format(op_name=op_name, **op_data)
+                for op_name, op_data in performance_data['operations_breakdown'].items()
+            )
+        
+        print("\n".join(chunks))
+    
+    def save_results_to_file(self, results: Dict[str, Any], filename: str = None,
+                             output_format: str = 'txt') -> bool:
+        """保存结果到文件 - output_format为 'txt'（可读报告）或 'jsonl'（每行一个JSON对象，便于流式处理）"""
+        if output_format not in ('txt', 'jsonl'):
+            self.display_error(f"不支持的保存格式: {output_format}")
+            return False
+        
         try:
             if not filename:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"rag_query_result_{timestamp}.txt"
+                filename = f"rag_query_result_{timestamp}.{output_format}"
+            
+            if output_format == 'jsonl':
+                self._write_results_jsonl(results, filename)
+                self.display_success(f"结果已保存到: {filename}")
+                return True
+            
+            parts = [
+                _EQ80 + "\n",
+                "RAG查询结果报告\n",
+                _EQ80 + "\n\n",
+                f"查询时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+                f"原始查询: {results.get('original_query', 'N/A')}\n",
+            ]
+            
+            if results.get('rewritten_query'):
+                parts.append(f"重写查询: {results['rewritten_query']}\n")
+            
+            parts.append(f"检索方法: {results.get('retrieval_method', 'N/A')}\n\n")
+            
+            # 保存检索文档
+            retrieved_docs = results.get('retrieved_docs', [])
+            if retrieved_docs:
+                parts.append(f"检索到的文档 (共{len(retrieved_docs)}个):\n")
+                parts.append(_DASH60 + "\n")
+                parts.extend(
+                    f"\n文档 {i}:\n"
+                    f"相关度分数: {doc.get('rrf_score', doc.get('similarity', 0)):.4f}\n"
+                    f"内容: {doc.get('text', '')}\n"
+                    f"{_DASH60}\n"
+                    for i, doc in enumerate(retrieved_docs, 1)
+                )
+            
+            # 保存最终答案
+            parts.append(f"\n生成答案:\n")
+            parts.append(results.get('final_answer', 'N/A'))
+            parts.append("\n\n" + _EQ80)
             
+            # 拼接完成后一次写入文件
             with open(filename, 'w', encoding='utf-8') as f:
-                f.write("="*80 + "\n")
-                f.write("RAG查询结果报告\n")
-                f.write("="*80 + "\n\n")
-                f.write(f"查询时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"原始查询: {results.get('original_query', 'N/A')}\n")
-                
-                if results.get('rewritten_query'):
-                    f.write(f"重写查询: {results['rewritten_query']}\n")
-                
-                f.write(f"检索方法: {results.get('retrieval_method', 'N/A')}\n\n")
-                
-                # 保存检索文档
-                retrieved_docs = results.get('retrieved_docs', [])
-                if retrieved_docs:
-                    f.write(f"检索到的文档 (共{len(retrieved_docs)}个):\n")
-                    f.write("-" * 60 + "\n")
-                    
-                    for i, doc in enumerate(retrieved_docs, 1):
-                        score = doc.get('rrf_score', doc.get('similarity', 0))
-                        f.write(f"\n文档 {i}:\n")
-                        f.write(f"相关度分数: {score:.4f}\n")
-                        f.write(f"内容: {doc.get('text', '')}\n")
-                        f.write("-" * 60 + "\n")
-                
-                # 保存最终答案
-                f.write(f"\n生成答案:\n")
-                f.write(results.get('final_answer', 'N/A'))
-                f.write("\n\n" + "="*80)
+                f.write("".join(parts))
             
             self.display_success(f"结果已保存到: {filename}")
             return True
@@ -510,14 +759,43 @@ class EnhancedUserInterface:
             self.display_error(f"保存失败: {e}")
             return False
     
-    def get_input_with_validation(self, prompt: str, validator=None, error_msg: str = "输入无效，请重试") -> str:
-        """获取带验证的用户输入"""
+    @staticmethod
+    def _write_results_jsonl(results: Dict[str, Any], filename: str):
+        """以JSON Lines格式保存结果：首行为查询信息，其后每行一个检索文档"""
+        retrieved_docs = results.get('retrieved_docs', [])
+        header = {
+            'query_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'original_query': results.get('original_query'),
+            'rewritten_query': results.get('rewritten_query'),
+            'retrieval_method': results.get('retrieval_method'),
+            'final_answer': results.get('final_answer'),
+            'document_count': len(retrieved_docs),
+        }
+        
+        # 先完成全部序列化再打开文件，序列化出错时不会留下只写了一半的文件
+        lines = [_json_dumps(header), *map(_json_dumps, retrieved_docs)]
+        with open(filename, 'wb') as f:
+            f.write(b'\n'.join(lines))
+            f.write(b'\n')
+    
+    def get_input_with_validation(self, prompt: str,
+                                  validator: Union[Callable[[str], Any], re.Pattern, str, None] = None,
+                                  error_msg: str = "输入无效，请重试") -> str:
+        """获取带验证的用户输入
+        
+        validator可以是判断函数、已编译的正则或正则字符串，正则需完整匹配输入
+        """
+        if isinstance(validator, str):
+            validator = _compile_validator(validator)
+        if isinstance(validator, re.Pattern):
+            validator = validator.fullmatch
+        
         while True:
             try:
                 if self.use_rich:
                     user_input = Prompt.ask(prompt)
                 else:
-                    user_input = input(f"{prompt}: ").strip()
+                    user_input = _prompt(f"{prompt}: ").strip()
                 
                 if validator is None or validator(user_input):
                     return user_input
@@ -542,17 +820,9 @@ class EnhancedUserInterface:
         """Rich版本的文档来源选择"""
         self.console.print("\n📚 文档知识库设置", style="bold blue")
         
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("选项", style="cyan", width=8)
-        table.add_column("描述", style="white")
-        table.add_row("1", "在线文档 (输入URL)")
-        table.add_row("2", "本地文档 (输入文件路径)")
-        table.add_row("3", "批量本地文档 (输入目录路径)")
-        table.add_row("4", "使用默认示例PDF")
+        self.console.print(_menu_table('document_source'))
         
-        self.console.print(table)
-        
-        choice = Prompt.ask("\n请选择文档来源", choices=["1", "2", "3", "4"], default="4")
+        choice = Prompt.ask("\n请选择文档来源", choices=_MENU_CHOICES['document_source'], default="4")
         
         if choice == "1":
             urls = []
@@ -561,7 +831,7 @@ class EnhancedUserInterface:
                 if not url:
                     break
                 urls.append(url)
-            return urls if urls else ["https://arxiv.org/pdf/2303.17760.pdf"], "url"
+            return urls if urls else [DEFAULT_PDF_URL], "url"
         
         elif choice == "2":
             paths = []
@@ -578,45 +848,35 @@ class EnhancedUserInterface:
         elif choice == "3":
             dir_path = Prompt.ask("请输入目录路径")
             if os.path.exists(dir_path) and os.path.isdir(dir_path):
-                # 支持的文档格式
-                supported_exts = ['.pdf', '.docx', '.doc', '.txt', '.md', '.csv', '.xlsx', '.xls', '.pptx', '.json']
-                files = []
-                for ext in supported_exts:
-                    files.extend([str(p) for p in Path(dir_path).glob(f"*{ext}")])
-                return files, "path"
+                return _list_supported_files(dir_path), "path"
             else:
                 self.display_error("目录不存在")
                 return [], "path"
         
         else:
-            return ["https://arxiv.org/pdf/2303.17760.pdf"], "url"
+            return [DEFAULT_PDF_URL], "url"
     
     def _get_document_sources_basic(self) -> Tuple[List[str], str]:
         """基础版本的文档来源选择"""
-        print("\n📚 文档知识库设置")
-        print("="*50)
-        print("1. 在线文档 (输入URL)")
-        print("2. 本地文档 (输入文件路径)")
-        print("3. 批量本地文档 (输入目录路径)")
-        print("4. 使用默认示例PDF")
+        print(_BASIC_MENUS['document_source'])
         
-        choice = input("\n请选择文档来源 (1-4, 默认4): ").strip() or "4"
+        choice = _prompt("\n请选择文档来源 (1-4, 默认4): ").strip() or "4"
         
         if choice == "1":
             urls = []
             print("请输入文档URL (输入空行结束):")
             while True:
-                url = input("URL: ").strip()
+                url = _prompt("URL: ").strip()
                 if not url:
                     break
                 urls.append(url)
-            return urls if urls else ["https://arxiv.org/pdf/2303.17760.pdf"], "url"
+            return urls if urls else [DEFAULT_PDF_URL], "url"
         
         elif choice == "2":
             paths = []
             print("请输入文档文件路径 (输入空行结束):")
             while True:
-                path = input("路径: ").strip()
+                path = _prompt("路径: ").strip()
                 if not path:
                     break
                 if os.path.exists(path):
@@ -626,20 +886,15 @@ class EnhancedUserInterface:
             return paths, "path"
         
         elif choice == "3":
-            dir_path = input("请输入目录路径: ").strip()
+            dir_path = _prompt("请输入目录路径: ").strip()
             if os.path.exists(dir_path) and os.path.isdir(dir_path):
-                from pathlib import Path
-                supported_exts = ['.pdf', '.docx', '.doc', '.txt', '.md', '.csv', '.xlsx', '.xls', '.pptx', '.json']
-                files = []
-                for ext in supported_exts:
-                    files.extend([str(p) for p in Path(dir_path).glob(f"*{ext}")])
-                return files, "path"
+                return _list_supported_files(dir_path), "path"
             else:
                 print("❌ 目录不存在")
                 return [], "path"
         
         else:
-            return ["https://arxiv.org/pdf/2303.17760.pdf"], "url"
+            return [DEFAULT_PDF_URL], "url"
     
     def get_document_management_action(self) -> str:
         """获取文档管理操作"""
@@ -652,37 +907,19 @@ class EnhancedUserInterface:
         """Rich版本的文档管理操作选择"""
         self.console.print("\n📁 文档管理", style="bold blue")
         
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("操作", style="cyan", width=12)
-        table.add_column("描述", style="white")
-        
-        table.add_row("1. add", "添加新文档到知识库")
-        table.add_row("2. remove", "从知识库中移除文档")
-        table.add_row("3. list", "列出知识库中的所有文档")
-        table.add_row("4. cache", "缓存管理")
-        table.add_row("5. back", "返回主菜单")
-        
-        self.console.print(table)
+        self.console.print(_menu_table('document_management'))
         
-        choice = Prompt.ask("请选择操作", choices=["1", "2", "3", "4", "5"], default="5")
+        choice = Prompt.ask("请选择操作", choices=_MENU_CHOICES['document_management'], default="5")
         
-        action_map = {"1": "add", "2": "remove", "3": "list", "4": "cache", "5": "back"}
-        return action_map[choice]
+        return _DOCUMENT_ACTIONS[choice]
     
     def _get_document_management_action_basic(self) -> str:
         """基础版本的文档管理操作选择"""
-        print("\n📁 文档管理")
-        print("="*50)
-        print("1. 添加新文档到知识库")
-        print("2. 从知识库中移除文档")
-        print("3. 列出知识库中的所有文档")
-        print("4. 缓存管理")
-        print("5. 返回主菜单")
+        print(_BASIC_MENUS['document_management'])
         
-        choice = input("请选择操作 (1-5, 默认5): ").strip() or "5"
+        choice = _prompt("请选择操作 (1-5, 默认5): ").strip() or "5"
         
-        action_map = {"1": "add", "2": "remove", "3": "list", "4": "cache", "5": "back"}
-        return action_map.get(choice, "back")
+        return _DOCUMENT_ACTIONS.get(choice, "back")
     
     def select_documents_to_remove(self, current_sources: List[str]) -> List[str]:
         """选择要移除的文档"""
@@ -707,31 +944,46 @@ class EnhancedUserInterface:
         indices_str = Prompt.ask("请输入要移除的文档序号 (用逗号分隔, 如: 1,3,5)")
         
         try:
-            indices = [int(x.strip()) - 1 for x in indices_str.split(',') if x.strip()]
-            return [current_sources[i] for i in indices if 0 <= i < len(current_sources)]
-        except:
+            return self._parse_selected_sources(indices_str, current_sources)
+        except ValueError:
             self.display_error("输入格式错误")
             return []
     
     def _select_documents_to_remove_basic(self, current_sources: List[str]) -> List[str]:
         """基础版本的文档移除选择"""
         print("\n🗑️ 选择要移除的文档")
-        print("="*50)
+        print(_EQ50)
         
         for i, source in enumerate(current_sources, 1):
             print(f"{i}. {source}")
         
-        indices_str = input("请输入要移除的文档序号 (用逗号分隔, 如: 1,3,5): ").strip()
+        indices_str = _prompt("请输入要移除的文档序号 (用逗号分隔, 如: 1,3,5): ").strip()
         
         try:
-            indices = [int(x.strip()) - 1 for x in indices_str.split(',') if x.strip()]
-            return [current_sources[i] for i in indices if 0 <= i < len(current_sources)]
-        except:
+            return self._parse_selected_sources(indices_str, current_sources)
+        except ValueError:
             print("❌ 输入格式错误")
             return []
     
+    @staticmethod
+    def _parse_selected_sources(indices_str: str, current_sources: List[str]) -> List[str]:
+        """解析逗号分隔的序号（从1开始），去重后按序号顺序返回对应文档；格式错误时抛出ValueError"""
+        if not indices_str.strip():
+            return []
+        if not _INDICES_PATTERN.fullmatch(indices_str):
+            raise ValueError(f"无效的序号列表: {indices_str}")
+        
+        indices = {int(x) - 1 for x in indices_str.split(',') if x.strip()}
+        source_count = len(current_sources)
+        return [current_sources[i] for i in sorted(indices) if 0 <= i < source_count]
+    
     def display_document_list(self, sources: List[str]):
         """显示文档列表"""
+        if not sources:
+            # 没有文档时不输出空表格
+            self.display_warning("知识库中没有文档")
+            return
+        
         if self.use_rich:
             self._display_document_list_rich(sources)
         else:
@@ -744,20 +996,23 @@ class EnhancedUserInterface:
         table.add_column("文档路径", style="white")
         table.add_column("类型", style="yellow", width=8)
         
-        for i, source in enumerate(sources, 1):
-            doc_type = "URL" if source.startswith(('http://', 'https://')) else "本地"
-            table.add_row(str(i), source, doc_type)
+        rows = [
+            (str(i), source, "URL" if source.startswith(('http://', 'https://')) else "本地")
+            for i, source in enumerate(sources, 1)
+        ]
+        for row in rows:
+            table.add_row(*row)
         
         self.console.print(table)
     
     def _display_document_list_basic(self, sources: List[str]):
         """基础版本的文档列表显示"""
-        print("\n📚 知识库文档列表")
-        print("="*50)
-        
-        for i, source in enumerate(sources, 1):
-            doc_type = "URL" if source.startswith(('http://', 'https://')) else "本地"
-            print(f"{i}. [{doc_type}] {source}")
+        lines = ["\n📚 知识库文档列表", _EQ50]
+        lines.extend(
+            f"{i}. [{'URL' if source.startswith(('http://', 'https://')) else '本地'}] {source}"
+            for i, source in enumerate(sources, 1)
+        )
+        print("\n".join(lines))
     
     def display_cache_stats(self, cache_stats: Dict[str, Any]):
         """显示缓存统计"""
@@ -781,18 +1036,18 @@ class EnhancedUserInterface:
     
     def _display_cache_stats_basic(self, cache_stats: Dict[str, Any]):
         """基础版本的缓存统计显示"""
-        print("\n💾 缓存统计")
-        print("="*50)
-        print(f"缓存文档数: {cache_stats['cached_documents']}")
-        print(f"缓存文件数: {cache_stats['cache_files']}")
-        print(f"总缓存大小: {cache_stats['total_size_mb']:.1f}MB")
-        print(f"最大缓存大小: {cache_stats['max_size_mb']}MB")
-        print(f"缓存使用率: {cache_stats['cache_usage_percent']:.1f}%")
+        print(f"""
+💾 缓存统计
+{_EQ50}
+缓存文档数: {cache_stats['cached_documents']}
+缓存文件数: {cache_stats['cache_files']}
+总缓存大小: {cache_stats['total_size_mb']:.1f}MB
+最大缓存大小: {cache_stats['max_size_mb']}MB
+缓存使用率: {cache_stats['cache_usage_percent']:.1f}%""")
     
     def ask_clear_cache(self) -> bool:
         """询问是否清理缓存"""
         if self.use_rich:
             return Confirm.ask("🗑️ 是否清理所有缓存?", default=False)
         else:
-            choice = input("🗑️ 是否清理所有缓存? (y/n, 默认n): ").strip().lower()
-            return choice == 'y'
+            return _prompt("🗑️ 是否清理所有缓存? (y/n, 默认n): ").strip().lower() in _YES
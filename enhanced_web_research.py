@@ -3,16 +3,29 @@
 """
 
 import os
+import re
 import time
-import requests
+import socket
+import hashlib
 import asyncio
+import logging
+import warnings
 import aiohttp
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin, urlparse
+from collections import OrderedDict, defaultdict
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 import json
 from dataclasses import dataclass
 
+logger = logging.getLogger(__name__)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
 try:
     from bs4 import BeautifulSoup
     BS4_AVAILABLE = True
@@ -27,6 +40,110 @@ except ImportError:
     print("⚠ duckduckgo-search未安装，搜索功能受限")
     DDGS_AVAILABLE = False
 
+try:
+    import httpx
+    import h2  # noqa: F401  httpx的HTTP/2支持依赖h2
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    from sklearn.feature_extraction import FeatureHasher
+    from sklearn.metrics.pairwise import cosine_similarity
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+# 网页缓存配置
+PAGE_CACHE_SIZE = 512      # 内存中缓存的网页数
+PAGE_CACHE_TTL = 86400     # 默认新鲜期（秒），Cache-Control的max-age更短时以其为准
+SEARCH_CACHE_SIZE = 256    # 内存中缓存的搜索查询数
+SEARCH_CACHE_TTL = 3600    # 搜索结果缓存有效期（秒）
+KEEPALIVE_TIMEOUT = 30     # 空闲连接保留时间（秒），同一主机的后续请求可复用连接
+MAX_RETRIES = 2            # 连接失败或5xx时的重试次数
+RETRY_BACKOFF = 0.3        # 重试退避基数（秒），第n次重试前等待 RETRY_BACKOFF * 2**n
+_RETRY_STATUSES = frozenset({500, 502, 503, 504})
+PER_HOST_CONCURRENCY = 4   # 同一主机同时进行的请求数
+REQUESTS_PER_SECOND = 10   # 全局请求速率上限
+MAX_DOWNLOAD_BYTES = 256 * 1024  # 单个网页最多读取的字节数，足够提取3000字符的正文
+_MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+# 备用搜索结果模板: (标题, URL, 摘要)，仅需填入查询词
+_FALLBACK_TEMPLATES = (
+    ("关于{q}的学术资源", "https://scholar.google.com", "学术搜索结果关于{q}的相关研究和论文"),
+    ("{q} - 维基百科", "https://zh.wikipedia.org", "维基百科关于{q}的详细介绍和背景信息"),
+    ("{q}技术文档", "https://docs.example.com", "技术文档和教程关于{q}的实现和应用"),
+)
+
+# 相关性计算使用的分词器（Unicode单词）；有RE2时使用其线性时间的DFA引擎，
+# RE2的\w只匹配ASCII，因此用Unicode字符类表达同样的单词定义
+if RE2_AVAILABLE:
+    _tokenize = re2.compile(r'[\p{L}\p{N}_]+').findall
+else:
+    _tokenize = re.compile(r'\w+').findall
+
+# 把词频哈希到固定维度的稀疏向量，无需维护词表
+_FEATURE_HASHER = FeatureHasher(
+    n_features=2 ** 14, input_type='string', alternate_sign=False
+) if SKLEARN_AVAILABLE else None
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# 不影响页面内容的跟踪参数，规范化URL时去掉
+_TRACKING_PARAMS = frozenset({'fbclid', 'gclid'})
+
+def _canonical_url(url: str) -> str:
+    """规范化URL用于去重：协议和主机小写，去掉末尾斜杠、片段和跟踪参数，查询参数排序"""
+    parsed = urlparse(url)
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.startswith('utm_') and key not in _TRACKING_PARAMS
+    ]
+    return urlunparse((
+        parsed.scheme.lower(), parsed.netloc.lower(), parsed.path.rstrip('/') or '/',
+        parsed.params, urlencode(sorted(query)), ''
+    ))
+
+class RateLimitedError(Exception):
+    """服务器返回429，retry_after为建议的等待秒数（未提供时为None）"""
+    
+    def __init__(self, url: str, retry_after: Optional[float] = None):
+        super().__init__(f"429 Too Many Requests: {url}")
+        self.retry_after = retry_after
+
+class _TokenBucket:
+    """令牌桶限速器 - 平均每秒最多rate个请求，允许capacity个突发请求（仅在单个事件循环内使用）"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+    
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
 @dataclass
 class WebSearchResult:
     """网页搜索结果"""
@@ -39,52 +156,96 @@ class WebSearchResult:
 class EnhancedWebResearchSystem:
     """增强的网页研究系统 - 支持并发搜索"""
     
-    def __init__(self, max_results: int = 5, timeout: int = 10, max_workers: int = 3):
+    # 主要内容选择器，组合成一个选择器组，一次遍历即可匹配
+    _CONTENT_SELECTOR = 'article, main, .content, #content, .post-content, .entry-content, .article-content'
+    
+    # 提取正文前整体删除的标签：脚本样式以及导航、页脚等页面模板
+    # 不包含form和header：ASP.NET等页面用<form>包裹整个正文，文章也常把标题放在<header>里
+    _BOILERPLATE_TAGS = [
+        'script', 'style', 'noscript', 'template', 'svg',
+        'footer', 'nav', 'aside', 'iframe'
+    ]
+    
+    # 不值得发起请求的主机（例如备用搜索中的示例站点）
+    _BLOCKED_HOSTS = frozenset({'docs.example.com'})
+    _DNS_PREFLIGHT_TIMEOUT = 2  # 秒
+    
+    def __init__(self, max_results: int = 5, timeout: int = 10, max_workers: int = 3,
+                 cache_dir: Optional[str] = None, cache_ttl: float = PAGE_CACHE_TTL):
         self.max_results = max_results
         self.timeout = timeout
-        self.max_workers = max_workers  # 并发工作线程数
+        self.max_workers = max_workers  # 并发度基数，同时获取的网页数为其4倍
+        self.cache_dir = cache_dir  # 网页和搜索结果的磁盘缓存目录，None表示只在内存中缓存
+        self.cache_ttl = cache_ttl  # 网页缓存有效期（秒），Cache-Control的max-age更短时以其为准
         # 添加搜索间隔控制，避免被限制
         self.last_search_time = 0
         self.min_search_interval = 1  # 减少间隔，因为使用并发
         
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # HTTP客户端（httpx.AsyncClient或aiohttp.ClientSession）和事件循环按需创建，
+        # 客户端绑定在实例自己的事件循环上
+        self._http_client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+        
+        # 按主机限制并发，并用令牌桶限制全局请求速率，避免触发429后的退避重试
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(PER_HOST_CONCURRENCY)
+        )
+        self._rate_limiter = _TokenBucket(REQUESTS_PER_SECOND, REQUESTS_PER_SECOND)
+        
+        # 网页缓存：内存LRU + 指定cache_dir时的磁盘缓存；搜索结果缓存同样两级，按TTL过期
+        self._page_cache: OrderedDict = OrderedDict()
+        self._search_cache: Dict[tuple, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._disk_cache = None
+        if cache_dir:
+            if DISKCACHE_AVAILABLE:
+                try:
+                    self._disk_cache = diskcache.Cache(os.path.expanduser(cache_dir))
+                except Exception as e:
+                    print(f"⚠ 磁盘缓存初始化失败: {e}")
+            else:
+                print("⚠ diskcache未安装，网页缓存只保存在内存中")
         
-        # 创建线程池
-        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # DDGS客户端在首次搜索时创建，之后在整个系统生命周期内复用
+        self._ddgs = None
         
         print("网页研究系统初始化:")
         print(f"  BeautifulSoup4: {'✓' if BS4_AVAILABLE else '✗'}")
         print(f"  DuckDuckGo搜索: {'✓' if DDGS_AVAILABLE else '✗'}")
-        print(f"  并发搜索: {self.max_workers} 个工作线程")
+        print(f"  并发获取: 最多 {self.max_workers * 4} 个网页同时下载")
         print(f"  搜索间隔控制: {self.min_search_interval}秒")
+        print(f"  HTTP/2 (httpx): {'✓' if HTTPX_AVAILABLE else '✗'}")
+        print(f"  磁盘缓存: {'✓' if self._disk_cache is not None else '✗'}")
+    
+    def research_topic(self, query: str, max_pages: int = 3, refresh: bool = False) -> Dict[str, Any]:
+        """研究主题 - 并发搜索并分析网页内容（同步接口），refresh=True时跳过搜索结果和网页缓存"""
+        return self._run_async(self.research_topic_async(query, max_pages, refresh))
     
-    def research_topic(self, query: str, max_pages: int = 3) -> Dict[str, Any]:
-        """研究主题 - 并发搜索并分析网页内容"""
+    async def research_topic_async(self, query: str, max_pages: int = 3, refresh: bool = False) -> Dict[str, Any]:
+        """研究主题 - 整个流程运行在一个事件循环中，已在事件循环中的调用方可直接await"""
         print(f"\n开始并发网页研究: {query}")
         print("="*50)
         
         try:
             # 步骤1: 并发搜索相关网页
-            search_results = self._concurrent_search_web(query)
+            search_results = await self._concurrent_search_web(query, refresh)
             if not search_results:
                 return self._create_fallback_result(query)
             
             print(f"✓ 找到 {len(search_results)} 个搜索结果")
             
-            # 步骤2: 并发获取网页内容
-            target_results = search_results[:max_pages]
-            print(f"⚡ 开始并发获取 {len(target_results)} 个网页内容...")
+            # 步骤2: 并发获取网页内容，取最先成功的max_pages个
+            print(f"⚡ 开始并发获取网页内容（{len(search_results)} 个候选，需要 {max_pages} 个）...")
             
-            enriched_results = self._concurrent_fetch_content(target_results, query)
+            enriched_results, source_chunks = await self._concurrent_fetch_content(
+                search_results, query, max_pages, refresh
+            )
             
             if not enriched_results:
                 return self._create_fallback_result(query)
             
             # 步骤3: 分析和总结
-            analysis = self._analyze_web_content(query, enriched_results)
+            analysis = self._analyze_web_content(query, enriched_results, source_chunks)
             
             print(f"✓ 并发网页研究完成，分析了 {len(enriched_results)} 个网页")
             
@@ -100,37 +261,25 @@ class EnhancedWebResearchSystem:
             print(f"⚠ 并发网页研究失败: {e}")
             return self._create_fallback_result(query, str(e))
     
-    def _concurrent_search_web(self, query: str) -> List[WebSearchResult]:
-        """并发搜索网页 - 使用多个搜索策略"""
+    async def _concurrent_search_web(self, query: str, refresh: bool = False) -> List[WebSearchResult]:
+        """搜索网页 - 真实搜索没有结果时才使用备用搜索"""
         print("⚡ 启动并发搜索...")
         
-        # 定义多个搜索任务
-        search_tasks = [
-            ("DuckDuckGo Lite", self._search_duckduckgo_lite, query),
-            ("DuckDuckGo 标准", self._search_duckduckgo_standard, query),
-            ("备用搜索", self._fallback_search, query)
-        ]
-        
         all_results = []
+        try:
+            # DDGS是阻塞调用，放到工作线程中执行
+            results = await asyncio.wait_for(asyncio.to_thread(self._search_duckduckgo, query, refresh), timeout=30)
+            if results:
+                print(f"✓ DuckDuckGo 完成，获得 {len(results)} 个结果")
+                all_results = results
+            else:
+                print("⚠ DuckDuckGo 未获得结果")
+        except Exception as e:
+            print(f"⚠ DuckDuckGo 失败: {e!r}")
         
-        # 使用线程池并发执行搜索
-        with ThreadPoolExecutor(max_workers=len(search_tasks)) as executor:
-            future_to_task = {
-                executor.submit(task_func, task_query): task_name 
-                for task_name, task_func, task_query in search_tasks
-            }
-            
-            for future in as_completed(future_to_task, timeout=30):
-                task_name = future_to_task[future]
-                try:
-                    results = future.result(timeout=10)
-                    if results:
-                        print(f"✓ {task_name} 完成，获得 {len(results)} 个结果")
-                        all_results.extend(results)
-                    else:
-                        print(f"⚠ {task_name} 未获得结果")
-                except Exception as e:
-                    print(f"⚠ {task_name} 失败: {e}")
+        # 模拟结果只作兜底，避免稀释真实搜索结果的排序
+        if not all_results:
+            all_results = self._fallback_search(query)
         
         # 去重并排序
         unique_results = self._deduplicate_results(all_results)
@@ -138,11 +287,18 @@ class EnhancedWebResearchSystem:
         
         return unique_results[:self.max_results]
     
-    def _search_duckduckgo_lite(self, query: str) -> List[WebSearchResult]:
-        """DuckDuckGo Lite 搜索"""
-        if not DDGS_AVAILABLE:
+    def _search_duckduckgo(self, query: str, refresh: bool = False) -> List[WebSearchResult]:
+        """DuckDuckGo 搜索 - 使用lite后端单次调用；命中缓存时不访问网络"""
+        ddgs = self._get_ddgs()
+        if ddgs is None:
             return []
         
+        cache_key = ('ddgs', query, self.max_results)
+        search_results = None if refresh else self._get_cached_search(cache_key)
+        if search_results is not None:
+            print("✓ DuckDuckGo 命中搜索缓存")
+            return self._to_web_results(search_results)
+        
         try:
             # 控制搜索频率
             current_time = time.time()
@@ -151,113 +307,192 @@ class EnhancedWebResearchSystem:
                 wait_time = self.min_search_interval - time_since_last_search
                 time.sleep(wait_time)
             
-            with DDGS(
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
-                timeout=self.timeout,
-                proxies=None
-            ) as ddgs:
-                search_results = list(ddgs.text(
-                    keywords=query,
-                    max_results=3,
-                    region='wt-wt',
-                    safesearch='moderate',
-                    backend='lite'
-                ))
-                
-                results = []
-                for result in search_results:
-                    web_result = WebSearchResult(
-                        title=result.get('title', ''),
-                        url=result.get('href', ''),
-                        snippet=result.get('body', '')
-                    )
-                    results.append(web_result)
-                
-                self.last_search_time = time.time()
-                return results
-                
-        except Exception as e:
-            print(f"DuckDuckGo Lite 搜索异常: {e}")
-            return []
-    
-    def _search_duckduckgo_standard(self, query: str) -> List[WebSearchResult]:
-        """DuckDuckGo 标准搜索"""
-        if not DDGS_AVAILABLE:
-            return []
-        
-        try:
-            time.sleep(1)  # 稍微延迟避免冲突
+            search_results = ddgs.text(
+                keywords=query,
+                max_results=self.max_results,
+                region='wt-wt',
+                safesearch='moderate',
+                backend='lite'
+            )
+            self.last_search_time = time.time()
             
-            with DDGS() as ddgs:
-                search_results = list(ddgs.text(
-                    keywords=query,
-                    max_results=2,
-                    region='us-en',
-                    safesearch='off'
-                ))
-                
-                results = []
-                for result in search_results:
-                    web_result = WebSearchResult(
-                        title=result.get('title', ''),
-                        url=result.get('href', ''),
-                        snippet=result.get('body', '')
-                    )
-                    results.append(web_result)
-                
-                return results
+            search_results = list(search_results or [])
+            if search_results:
+                # 空结果多半是被限流，不缓存
+                self._store_cached_search(cache_key, search_results)
+            return self._to_web_results(search_results)
                 
         except Exception as e:
-            print(f"DuckDuckGo 标准搜索异常: {e}")
+            print(f"DuckDuckGo 搜索异常: {e}")
+            logger.debug("DuckDuckGo 搜索失败，返回空结果: query=%r", query, exc_info=True)
             return []
     
+    def _get_ddgs(self):
+        """获取DDGS客户端，首次使用时创建；创建失败时返回None，下次搜索时重试"""
+        if self._ddgs is None and DDGS_AVAILABLE:
+            try:
+                self._ddgs = DDGS(
+                    headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
+                    timeout=self.timeout
+                )
+            except Exception as e:
+                print(f"⚠ DuckDuckGo 客户端创建失败: {e}")
+                return None
+        return self._ddgs
+    
+    @staticmethod
+    def _to_web_results(search_results: List[Dict[str, Any]]) -> List[WebSearchResult]:
+        """把DDGS返回的字典转换为搜索结果（每次新建对象，后续填充内容不会污染缓存）"""
+        return [
+            WebSearchResult(
+                title=result.get('title', ''),
+                url=result.get('href', ''),
+                snippet=result.get('body', '')
+            )
+            for result in search_results
+        ]
+    
+    def _get_cached_search(self, cache_key: tuple) -> Optional[List[Dict[str, Any]]]:
+        """查找未过期的搜索结果缓存，先查内存再查磁盘"""
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            expires, search_results = cached
+            if expires > time.time():
+                return search_results
+            del self._search_cache[cache_key]
+        
+        if self._disk_cache is not None:
+            # 磁盘条目写入时已设置过期时间，过期后diskcache返回None
+            search_results = self._disk_cache.get(cache_key)
+            if search_results is not None:
+                self._search_cache[cache_key] = (time.time() + SEARCH_CACHE_TTL, search_results)
+                return search_results
+        return None
+    
+    def _store_cached_search(self, cache_key: tuple, search_results: List[Dict[str, Any]]):
+        """写入搜索结果缓存"""
+        self._search_cache[cache_key] = (time.time() + SEARCH_CACHE_TTL, search_results)
+        if len(self._search_cache) > SEARCH_CACHE_SIZE:
+            # 丢弃最早写入的查询
+            del self._search_cache[next(iter(self._search_cache))]
+        if self._disk_cache is not None:
+            self._disk_cache.set(cache_key, search_results, expire=SEARCH_CACHE_TTL)
+    
     def _deduplicate_results(self, results: List[WebSearchResult]) -> List[WebSearchResult]:
-        """去重搜索结果"""
-        seen_urls = set()
+        """去重搜索结果 - 按规范化后的URL去重，重复结果的摘要合并到保留的结果中"""
+        kept_by_url: Dict[str, WebSearchResult] = {}
         unique_results = []
         
         for result in results:
-            if result.url not in seen_urls and result.url:
-                seen_urls.add(result.url)
+            if not result.url:
+                continue
+            canonical = _canonical_url(result.url)
+            kept = kept_by_url.get(canonical)
+            if kept is None:
+                kept_by_url[canonical] = result
                 unique_results.append(result)
+            elif result.snippet and result.snippet not in kept.snippet:
+                kept.snippet = f"{kept.snippet} {result.snippet}".strip()
         
         # 按标题长度和URL质量排序
         unique_results.sort(key=lambda x: (len(x.title), len(x.snippet)), reverse=True)
         return unique_results
     
-    def _concurrent_fetch_content(self, results: List[WebSearchResult], query: str) -> List[WebSearchResult]:
-        """并发获取网页内容"""
-        enriched_results = []
+    def _run_async(self, coro):
+        """在实例自己的事件循环中运行协程"""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+    
+    async def _ensure_session(self):
+        """获取共享的HTTP客户端 - 优先使用支持HTTP/2多路复用的httpx，否则使用aiohttp"""
+        if self._http_client is None or self._client_is_closed():
+            if HTTPX_AVAILABLE:
+                self._http_client = httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=32, max_keepalive_connections=16,
+                        keepalive_expiry=KEEPALIVE_TIMEOUT
+                    ),
+                    headers=DEFAULT_HEADERS,
+                    timeout=self.timeout,
+                    follow_redirects=True
+                )
+            else:
+                self._http_client = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(
+                        limit=32, limit_per_host=8, ttl_dns_cache=300,
+                        keepalive_timeout=KEEPALIVE_TIMEOUT
+                    ),
+                    headers=DEFAULT_HEADERS,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                )
+            self._closed = False
+        return self._http_client
+    
+    def _client_is_closed(self) -> bool:
+        """HTTP客户端是否已关闭"""
+        if HTTPX_AVAILABLE:
+            return self._http_client.is_closed
+        return self._http_client.closed
+    
+    async def _concurrent_fetch_content(self, results: List[WebSearchResult], query: str,
+                                        max_pages: Optional[int] = None,
+                                        refresh: bool = False) -> Tuple[List[WebSearchResult], List[str]]:
+        """并发获取网页内容，凑够max_pages个成功结果后立即返回(结果列表, 对应的内容块)，按完成先后排列"""
+        # 提交任务前先过滤掉非HTTP链接和被屏蔽的主机，避免为它们白等一次超时
+        fetchable = [
+            result for result in results
+            if result.url.startswith(('http://', 'https://'))
+            and urlparse(result.url).hostname not in self._BLOCKED_HOSTS
+        ]
+        if len(fetchable) < len(results):
+            print(f"⚠ 跳过 {len(results) - len(fetchable)} 个无效或被屏蔽的链接")
+        results = fetchable
         
-        # 使用线程池并发获取内容
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_result = {
-                executor.submit(self._fetch_and_process_content, result, query): result 
-                for result in results
-            }
-            
-            for future in as_completed(future_to_result, timeout=60):
-                result = future_to_result[future]
-                try:
-                    processed_result = future.result(timeout=15)
-                    if processed_result:
-                        enriched_results.append(processed_result)
-                        print(f"✓ 成功获取: {result.title[:30]}... ({len(processed_result.content)}字符)")
-                    else:
-                        print(f"⚠ 内容获取失败: {result.title[:30]}...")
-                except Exception as e:
-                    print(f"⚠ 处理失败 {result.title[:30]}...: {e}")
+        semaphore = asyncio.Semaphore(self.max_workers * 4)
         
-        return enriched_results
-    
-    def _fetch_and_process_content(self, result: WebSearchResult, query: str) -> Optional[WebSearchResult]:
-        """获取并处理单个网页内容"""
+        async def fetch(result: WebSearchResult):
+            async with semaphore:
+                return result, await self._fetch_and_process_content(result, refresh)
+        
+        max_pages = max_pages or len(results)
+        tasks = [asyncio.create_task(fetch(result)) for result in results]
+        
+        enriched_results = []
+        source_chunks = []
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=self.timeout + 5):
+                result, processed_result = await next_done
+                if processed_result:
+                    enriched_result, source_chunk = processed_result
+                    enriched_results.append(enriched_result)
+                    source_chunks.append(source_chunk)
+                    print(f"✓ 成功获取: {result.title[:30]}... ({len(enriched_result.content)}字符)")
+                    if len(enriched_results) >= max_pages:
+                        break
+                else:
+                    print(f"⚠ 内容获取失败: {result.title[:30]}...")
+        except asyncio.TimeoutError:
+            print(f"⚠ 网页获取超时，使用已获取的 {len(enriched_results)} 个网页")
+        finally:
+            # 已凑够或已超时，剩余的获取任务不再需要
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # 所有网页到齐后一次性批量计算相关性
+        self._score_relevance(_tokenize(query.lower()), enriched_results)
+        return enriched_results, source_chunks
+    
+    async def _fetch_and_process_content(self, result: WebSearchResult,
+                                         refresh: bool = False) -> Optional[Tuple[WebSearchResult, str]]:
+        """获取并处理单个网页内容 - 下载、提取后顺便生成分析用的内容块，后续无需再遍历正文"""
         try:
-            content = self._fetch_webpage_content(result.url)
+            content = await self._fetch_webpage_content_async(result.url, refresh)
             if content:
                 result.content = content
-                result.relevance_score = self._calculate_relevance(query, result)
-                return result
+                return result, f"来源: {result.title}\n{content}"
             return None
         except Exception as e:
             print(f"获取内容异常 {result.url}: {e}")
@@ -269,63 +504,221 @@ class EnhancedWebResearchSystem:
         
         # 模拟一些相关的搜索结果
         fallback_results = [
-            WebSearchResult(
-                title=f"关于{query}的学术资源",
-                url="https://scholar.google.com",
-                snippet=f"学术搜索结果关于{query}的相关研究和论文"
-            ),
-            WebSearchResult(
-                title=f"{query} - 维基百科",
-                url="https://zh.wikipedia.org",
-                snippet=f"维基百科关于{query}的详细介绍和背景信息"
-            ),
-            WebSearchResult(
-                title=f"{query}技术文档",
-                url="https://docs.example.com",
-                snippet=f"技术文档和教程关于{query}的实现和应用"
-            )
+            WebSearchResult(title.format(q=query), url, snippet.format(q=query))
+            for title, url, snippet in _FALLBACK_TEMPLATES
         ]
         
         print(f"✓ 备用搜索完成，生成 {len(fallback_results)} 个模拟结果")
         return fallback_results
     
-    def _fetch_webpage_content(self, url: str) -> str:
-        """获取网页内容"""
+    async def _fetch_webpage_content_async(self, url: str, refresh: bool = False) -> str:
+        """获取网页内容 - 缓存提取后的正文，命中缓存或服务器返回304时既不下载也不解析
+        
+        refresh=True时不读取缓存，重新下载后更新缓存
+        """
         try:
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            if not BS4_AVAILABLE:
-                # 简单的文本提取
-                return response.text[:2000]  # 限制长度
-            
-            # 使用BeautifulSoup解析
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 移除脚本和样式
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # 提取主要内容
-            content_selectors = [
-                'article', 'main', '.content', '#content',
-                '.post-content', '.entry-content', '.article-content'
-            ]
+            cache_key = self._page_cache_key(url)
+            entry = None if refresh else self._get_cached_page(cache_key)
+            if entry is not None and entry['expires'] > time.time():
+                return entry['content']
+            
+            if not await self._host_resolves(url):
+                raise ConnectionError(f"无法解析主机: {urlparse(url).hostname}")
+            
+            # 缓存过期时用条件请求重新验证
+            headers = {}
+            if entry is not None and entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry is not None and entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            
+            status, response_headers, html = await self._request_with_retry(url, headers)
+            if status == 304 and entry is not None:
+                content = entry['content']
+            else:
+                # 解析是CPU密集操作，放到工作线程中避免阻塞事件循环
+                content = await asyncio.to_thread(self._extract_webpage_text, html)
             
-            main_content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    main_content = elements[0].get_text(strip=True)
-                    break
+            self._cache_page_content(cache_key, content, response_headers, entry)
+            return content
             
-            if not main_content:
-                # 提取body内容
-                body = soup.find('body')
-                if body:
-                    main_content = body.get_text(strip=True)
-                else:
-                    main_content = soup.get_text(strip=True)
+        except Exception as e:
+            print(f"⚠ 网页内容获取失败 ({url}): {e}")
+            return ""
+    
+    @staticmethod
+    def _page_cache_key(url: str) -> str:
+        """网页缓存键 - 规范化URL的blake2b摘要，只差跟踪参数或末尾斜杠的链接共用缓存"""
+        return hashlib.blake2b(_canonical_url(url).encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _cache_page_content(self, cache_key: str, content: str, response_headers: Any,
+                            previous_entry: Optional[Dict[str, Any]]):
+        """按Cache-Control缓存提取后的正文，同时保存ETag/Last-Modified供重新验证"""
+        cache_control = response_headers.get('Cache-Control', '')
+        if not content or 'no-store' in cache_control:
+            return
+        
+        match = _MAX_AGE_PATTERN.search(cache_control)
+        ttl = min(int(match.group(1)), self.cache_ttl) if match else self.cache_ttl
+        previous_entry = previous_entry or {}
+        self._store_cached_page(cache_key, {
+            'content': content,
+            'etag': response_headers.get('ETag') or previous_entry.get('etag'),
+            'last_modified': response_headers.get('Last-Modified') or previous_entry.get('last_modified'),
+            'expires': time.time() + ttl
+        })
+    
+    async def _host_resolves(self, url: str) -> bool:
+        """DNS预检 - 在限定时间内解析不了的主机直接放弃"""
+        parsed = urlparse(url)
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        try:
+            loop = asyncio.get_running_loop()
+            await asyncio.wait_for(
+                loop.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM),
+                timeout=self._DNS_PREFLIGHT_TIMEOUT
+            )
+            return True
+        except (socket.gaierror, asyncio.TimeoutError, OSError, UnicodeError):
+            return False
+    
+    async def _request_with_retry(self, url: str, headers: Dict[str, str]) -> Tuple[int, Any, bytes]:
+        """发送请求 - 受主机并发和全局速率限制，连接失败或5xx时按指数退避重试，429时按Retry-After重试一次"""
+        host_semaphore = self._host_semaphores[urlparse(url).hostname]
+        rate_limited = False
+        for attempt in range(MAX_RETRIES + 1):
+            delay = RETRY_BACKOFF * (2 ** attempt)
+            try:
+                async with host_semaphore:
+                    await self._rate_limiter.acquire()
+                    return await self._request_limited(url, headers)
+            except RateLimitedError as e:
+                if rate_limited or attempt == MAX_RETRIES:
+                    raise
+                rate_limited = True
+                delay = min(max(e.retry_after or 0, delay), self.timeout)
+            except Exception as e:
+                if attempt == MAX_RETRIES or not self._is_retryable(e):
+                    raise
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """判断请求异常是否值得重试（超时不重试，避免成倍拉长等待时间）"""
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in _RETRY_STATUSES
+        if isinstance(error, aiohttp.ServerTimeoutError):
+            return False
+        if isinstance(error, aiohttp.ClientConnectionError):
+            return True
+        if HTTPX_AVAILABLE:
+            if isinstance(error, httpx.HTTPStatusError):
+                return error.response.status_code in _RETRY_STATUSES
+            if isinstance(error, (httpx.ConnectError, httpx.RemoteProtocolError)):
+                return True
+        return False
+    
+    async def _request_limited(self, url: str, headers: Dict[str, str]) -> Tuple[int, Any, bytes]:
+        """发送GET请求，返回(状态码, 响应头, 最多MAX_DOWNLOAD_BYTES的响应体)，304时响应体为空"""
+        client = await self._ensure_session()
+        
+        if HTTPX_AVAILABLE:
+            async with client.stream('GET', url, headers=headers) as response:
+                if response.status_code == 304:
+                    return 304, response.headers, b""
+                if response.status_code == 429:
+                    raise RateLimitedError(url, self._parse_retry_after(response.headers.get('Retry-After')))
+                response.raise_for_status()
+                self._check_content_type(response.headers.get('Content-Type', ''))
+                return response.status_code, response.headers, await self._read_limited_httpx(response)
+        
+        async with client.get(url, headers=headers) as response:
+            if response.status == 304:
+                return 304, response.headers, b""
+            if response.status == 429:
+                raise RateLimitedError(url, self._parse_retry_after(response.headers.get('Retry-After')))
+            response.raise_for_status()
+            self._check_content_type(response.headers.get('Content-Type', ''))
+            return response.status, response.headers, await self._read_limited(response)
+    
+    @staticmethod
+    def _check_content_type(content_type: str):
+        """只读取文本/HTML响应，PDF、图片等二进制内容在读取响应体前直接放弃"""
+        media_type = content_type.split(';', 1)[0].strip().lower()
+        if media_type and not (media_type.startswith('text/') or 'html' in media_type or 'xml' in media_type):
+            raise ValueError(f"非网页内容: {media_type}")
+    
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """解析Retry-After头，支持秒数和HTTP日期两种格式"""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    async def _read_limited(response: aiohttp.ClientResponse) -> bytes:
+        """流式读取响应体，最多读取MAX_DOWNLOAD_BYTES（aiohttp会自动解压gzip）"""
+        try:
+            return await response.content.readexactly(MAX_DOWNLOAD_BYTES)
+        except asyncio.IncompleteReadError as e:
+            # 页面比上限小，返回完整内容
+            return e.partial
+    
+    @staticmethod
+    async def _read_limited_httpx(response) -> bytes:
+        """流式读取httpx响应体，最多读取MAX_DOWNLOAD_BYTES"""
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= MAX_DOWNLOAD_BYTES:
+                break
+        return b"".join(chunks)[:MAX_DOWNLOAD_BYTES]
+    
+    def _get_cached_page(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """查找网页缓存，先查内存再查磁盘"""
+        entry = self._page_cache.get(cache_key)
+        if entry is not None:
+            self._page_cache.move_to_end(cache_key)
+            return entry
+        
+        if self._disk_cache is not None:
+            entry = self._disk_cache.get(cache_key)
+            if entry is not None:
+                self._remember_page(cache_key, entry)
+        return entry
+    
+    def _store_cached_page(self, cache_key: str, entry: Dict[str, Any]):
+        """写入网页缓存"""
+        self._remember_page(cache_key, entry)
+        if self._disk_cache is not None:
+            self._disk_cache.set(cache_key, entry, expire=self.cache_ttl)
+    
+    def _remember_page(self, cache_key: str, entry: Dict[str, Any]):
+        """写入内存LRU缓存"""
+        self._page_cache[cache_key] = entry
+        self._page_cache.move_to_end(cache_key)
+        if len(self._page_cache) > PAGE_CACHE_SIZE:
+            self._page_cache.popitem(last=False)
+    
+    @staticmethod
+    def _extract_webpage_text(html: bytes) -> str:
+        """从网页HTML中提取正文文本"""
+        try:
+            if SELECTOLAX_AVAILABLE:
+                main_content = EnhancedWebResearchSystem._extract_main_text_selectolax(html)
+            elif BS4_AVAILABLE:
+                main_content = EnhancedWebResearchSystem._extract_main_text_bs4(html)
+            else:
+                # 简单的文本提取
+                return html.decode('utf-8', errors='ignore')[:2000]  # 限制长度
             
             # 清理和限制长度
             lines = main_content.split('\n')
@@ -339,21 +732,89 @@ class EnhancedWebResearchSystem:
             return content
             
         except Exception as e:
-            print(f"⚠ 网页内容获取失败 ({url}): {e}")
+            print(f"⚠ 网页内容解析失败: {e}")
             return ""
     
-    def _calculate_relevance(self, query: str, result: WebSearchResult) -> float:
-        """计算相关性分数"""
+    @staticmethod
+    def _extract_main_text_selectolax(html: bytes) -> str:
+        """使用selectolax（C实现的lexbor解析器）提取主要内容"""
+        tree = HTMLParser(html)
+        
+        # 一次C层遍历移除脚本、样式和页面模板
+        tree.strip_tags(EnhancedWebResearchSystem._BOILERPLATE_TAGS)
+        
+        # 组合选择器，一次遍历找到第一个主要内容节点
+        node = tree.css_first(EnhancedWebResearchSystem._CONTENT_SELECTOR)
+        if node is None:
+            node = tree.body or tree.root
+        return node.text(separator='\n', strip=True) if node is not None else ""
+    
+    @staticmethod
+    def _extract_main_text_bs4(html: bytes) -> str:
+        """使用BeautifulSoup提取主要内容（未安装selectolax时的备用方案）"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # 移除脚本和样式
+        for script in soup(["script", "style"]):
+            script.decompose()
+        
+        # 提取主要内容
+        element = soup.select_one(EnhancedWebResearchSystem._CONTENT_SELECTOR)
+        main_content = element.get_text(strip=True) if element else ""
+        
+        if not main_content:
+            # 提取body内容
+            body = soup.find('body')
+            if body:
+                main_content = body.get_text(strip=True)
+            else:
+                main_content = soup.get_text(strip=True)
+        
+        return main_content
+    
+    def _score_relevance(self, query_terms: List[str], results: List[WebSearchResult]):
+        """批量计算相关性分数 - 标题和内容的词频哈希向量与查询向量的余弦相似度"""
+        if not results:
+            return
+        
+        if not SKLEARN_AVAILABLE or not query_terms:
+            query_tokens = frozenset(query_terms)
+            for result in results:
+                result.relevance_score = self._calculate_relevance(query_tokens, result)
+            return
+        
+        try:
+            # 一次transform得到所有标题和内容的向量，前半为标题，后半为内容
+            query_vector = _FEATURE_HASHER.transform([query_terms])
+            doc_vectors = _FEATURE_HASHER.transform(
+                [_tokenize(result.title.lower()) for result in results] +
+                [_tokenize(result.content.lower()) for result in results]
+            )
+            similarities = cosine_similarity(doc_vectors, query_vector).ravel()
+            
+            count = len(results)
+            scores = similarities[:count] * 0.4 + similarities[count:] * 0.6
+            for result, score in zip(results, scores):
+                result.relevance_score = min(float(score), 1.0)
+                
+        except Exception as e:
+            print(f"⚠ 相关性批量计算失败: {e}")
+            for result in results:
+                result.relevance_score = 0.5  # 默认分数
+    
+    def _calculate_relevance(self, query_tokens: frozenset, result: WebSearchResult) -> float:
+        """计算相关性分数（query_tokens为预先分好词的查询词集合，未安装scikit-learn时使用）"""
         try:
-            query_words = set(query.lower().split())
+            if not query_tokens:
+                return 0.0
             
             # 检查标题相关性
-            title_words = set(result.title.lower().split())
-            title_score = len(query_words.intersection(title_words)) / len(query_words) if query_words else 0
+            title_words = set(_tokenize(result.title.lower()))
+            title_score = len(query_tokens & title_words) / len(query_tokens)
             
             # 检查内容相关性
-            content_words = set(result.content.lower().split())
-            content_score = len(query_words.intersection(content_words)) / len(query_words) if query_words else 0
+            content_words = set(_tokenize(result.content.lower()))
+            content_score = len(query_tokens & content_words) / len(query_tokens)
             
             # 综合分数
             relevance = (title_score * 0.4 + content_score * 0.6)
@@ -362,44 +823,29 @@ class EnhancedWebResearchSystem:
         except Exception:
             return 0.5  # 默认分数
     
-    def _analyze_web_content(self, query: str, results: List[WebSearchResult]) -> str:
-        """分析网页内容"""
+    def _analyze_web_content(self, query: str, results: List[WebSearchResult], source_chunks: List[str]) -> str:
+        """分析网页内容 - source_chunks是获取网页时已生成的带来源前缀的内容块"""
         try:
-            # 合并所有内容
-            all_content = []
-            sources = []
-            
-            for result in results:
-                if result.content:
-                    all_content.append(f"来源: {result.title}\n{result.content}")
-                    sources.append(result.title)
-            
-            if not all_content:
+            if not source_chunks:
                 return f"未能获取到关于'{query}'的有效网页内容。"
             
-            # 生成分析摘要
-            analysis = f"基于{len(results)}个网页源的研究分析:\n\n"
-            
-            # 添加来源信息
-            analysis += "信息来源:\n"
-            for i, source in enumerate(sources, 1):
-                analysis += f"{i}. {source}\n"
-            analysis += "\n"
-            
-            # 添加内容摘要
-            analysis += "内容摘要:\n"
-            combined_content = "\n\n".join(all_content)
-            
+            # 生成分析摘要（先收集各部分，最后一次拼接）
+            combined_content = "\n\n".join(source_chunks)
             # 简单的内容摘要（取前1000字符）
-            if len(combined_content) > 1000:
-                analysis += combined_content[:1000] + "...\n\n"
-            else:
-                analysis += combined_content + "\n\n"
+            summary = combined_content[:1000] + "..." if len(combined_content) > 1000 else combined_content
             
-            # 添加关键信息提取
-            analysis += f"关于'{query}'的关键信息已从上述网页源中提取和整理。"
+            parts = [f"基于{len(results)}个网页源的研究分析:", "", "信息来源:"]
+            parts.extend(f"{i}. {result.title}" for i, result in enumerate(results, 1))
+            parts.extend([
+                "",
+                "内容摘要:",
+                summary,
+                "",
+                # 添加关键信息提取
+                f"关于'{query}'的关键信息已从上述网页源中提取和整理。"
+            ])
             
-            return analysis
+            return "\n".join(parts)
             
         except Exception as e:
             return f"内容分析过程中出现错误: {e}"
@@ -442,891 +888,54 @@ class EnhancedWebResearchSystem:
             'min_search_interval': self.min_search_interval,
             'last_search_time': self.last_search_time,
             'max_workers': self.max_workers,
-            'concurrent_enabled': True
+            'concurrent_enabled': True,
+            'cached_pages': len(self._page_cache),
+            'cached_searches': len(self._search_cache),
+            'disk_cache_enabled': self._disk_cache is not None,
+            'cache_dir': self.cache_dir,
+            'http2_enabled': HTTPX_AVAILABLE
         }
     
-    def __del__(self):
-        """清理资源"""
-        try:
-            if hasattr(self, 'executor'):
-                self.executor.shutdown(wait=False)
-        except:
-            pass
-"""
-增强的网页研究系统 - 真实网页内容获取和分析
-"""
-
-import os
-import time
-import requests
-import asyncio
-import aiohttp
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin, urlparse
-import json
-from dataclasses import dataclass
-
-try:
-    from bs4 import BeautifulSoup
-    BS4_AVAILABLE = True
-except ImportError:
-    print("⚠ BeautifulSoup4未安装，网页解析功能受限")
-    BS4_AVAILABLE = False
-
-try:
-    from duckduckgo_search import DDGS
-    DDGS_AVAILABLE = True
-except ImportError:
-    print("⚠ duckduckgo-search未安装，搜索功能受限")
-    DDGS_AVAILABLE = False
-
-@dataclass
-class WebSearchResult:
-    """网页搜索结果"""
-    title: str
-    url: str
-    snippet: str
-    content: str = ""
-    relevance_score: float = 0.0
-
-class EnhancedWebResearchSystem:
-    """增强的网页研究系统 - 支持并发搜索"""
-    
-    def __init__(self, max_results: int = 5, timeout: int = 10, max_workers: int = 3):
-        self.max_results = max_results
-        self.timeout = timeout
-        self.max_workers = max_workers  # 并发工作线程数
-        # 添加搜索间隔控制，避免被限制
-        self.last_search_time = 0
-        self.min_search_interval = 1  # 减少间隔，因为使用并发
-        
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        
-        # 创建线程池
-        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
-        
-        print("网页研究系统初始化:")
-        print(f"  BeautifulSoup4: {'✓' if BS4_AVAILABLE else '✗'}")
-        print(f"  DuckDuckGo搜索: {'✓' if DDGS_AVAILABLE else '✗'}")
-        print(f"  并发搜索: {self.max_workers} 个工作线程")
-        print(f"  搜索间隔控制: {self.min_search_interval}秒")
-    
-    def research_topic(self, query: str, max_pages: int = 3) -> Dict[str, Any]:
-        """研究主题 - 并发搜索并分析网页内容"""
-        print(f"\n开始并发网页研究: {query}")
-        print("="*50)
-        
-        try:
-            # 步骤1: 并发搜索相关网页
-            search_results = self._concurrent_search_web(query)
-            if not search_results:
-                return self._create_fallback_result(query)
-            
-            print(f"✓ 找到 {len(search_results)} 个搜索结果")
-            
-            # 步骤2: 并发获取网页内容
-            target_results = search_results[:max_pages]
-            print(f"⚡ 开始并发获取 {len(target_results)} 个网页内容...")
-            
-            enriched_results = self._concurrent_fetch_content(target_results, query)
-            
-            if not enriched_results:
-                return self._create_fallback_result(query)
-            
-            # 步骤3: 分析和总结
-            analysis = self._analyze_web_content(query, enriched_results)
-            
-            print(f"✓ 并发网页研究完成，分析了 {len(enriched_results)} 个网页")
-            
-            return {
-                'query': query,
-                'search_results': enriched_results,
-                'analysis': analysis,
-                'total_sources': len(enriched_results),
-                'research_method': 'Enhanced Concurrent Web Research'
-            }
-            
-        except Exception as e:
-            print(f"⚠ 并发网页研究失败: {e}")
-            return self._create_fallback_result(query, str(e))
-    
-    def _concurrent_search_web(self, query: str) -> List[WebSearchResult]:
-        """并发搜索网页 - 使用多个搜索策略"""
-        print("⚡ 启动并发搜索...")
-        
-        # 定义多个搜索任务
-        search_tasks = [
-            ("DuckDuckGo Lite", self._search_duckduckgo_lite, query),
-            ("DuckDuckGo 标准", self._search_duckduckgo_standard, query),
-            ("备用搜索", self._fallback_search, query)
-        ]
-        
-        all_results = []
-        
-        # 使用线程池并发执行搜索
-        with ThreadPoolExecutor(max_workers=len(search_tasks)) as executor:
-            future_to_task = {
-                executor.submit(task_func, task_query): task_name 
-                for task_name, task_func, task_query in search_tasks
-            }
-            
-            for future in as_completed(future_to_task, timeout=30):
-                task_name = future_to_task[future]
-                try:
-                    results = future.result(timeout=10)
-                    if results:
-                        print(f"✓ {task_name} 完成，获得 {len(results)} 个结果")
-                        all_results.extend(results)
-                    else:
-                        print(f"⚠ {task_name} 未获得结果")
-                except Exception as e:
-                    print(f"⚠ {task_name} 失败: {e}")
-        
-        # 去重并排序
-        unique_results = self._deduplicate_results(all_results)
-        print(f"✓ 并发搜索完成，总共获得 {len(unique_results)} 个唯一结果")
-        
-        return unique_results[:self.max_results]
-    
-    def _search_duckduckgo_lite(self, query: str) -> List[WebSearchResult]:
-        """DuckDuckGo Lite 搜索"""
-        if not DDGS_AVAILABLE:
-            return []
-        
-        try:
-            # 控制搜索频率
-            current_time = time.time()
-            time_since_last_search = current_time - self.last_search_time
-            if time_since_last_search < self.min_search_interval:
-                wait_time = self.min_search_interval - time_since_last_search
-                time.sleep(wait_time)
-            
-            with DDGS(
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
-                timeout=self.timeout,
-                proxies=None
-            ) as ddgs:
-                search_results = list(ddgs.text(
-                    keywords=query,
-                    max_results=3,
-                    region='wt-wt',
-                    safesearch='moderate',
-                    backend='lite'
-                ))
-                
-                results = []
-                for result in search_results:
-                    web_result = WebSearchResult(
-                        title=result.get('title', ''),
-                        url=result.get('href', ''),
-                        snippet=result.get('body', '')
-                    )
-                    results.append(web_result)
-                
-                self.last_search_time = time.time()
-                return results
-                
-        except Exception as e:
-            print(f"DuckDuckGo Lite 搜索异常: {e}")
-            return []
-    
-    def _search_duckduckgo_standard(self, query: str) -> List[WebSearchResult]:
-        """DuckDuckGo 标准搜索"""
-        if not DDGS_AVAILABLE:
-            return []
-        
-        try:
-            time.sleep(1)  # 稍微延迟避免冲突
-            
-            with DDGS() as ddgs:
-                search_results = list(ddgs.text(
-                    keywords=query,
-                    max_results=2,
-                    region='us-en',
-                    safesearch='off'
-                ))
-                
-                results = []
-                for result in search_results:
-                    web_result = WebSearchResult(
-                        title=result.get('title', ''),
-                        url=result.get('href', ''),
-                        snippet=result.get('body', '')
-                    )
-                    results.append(web_result)
-                
-                return results
-                
-        except Exception as e:
-            print(f"DuckDuckGo 标准搜索异常: {e}")
-            return []
+    async def aclose(self):
+        """关闭HTTP客户端和磁盘缓存（供已在事件循环中的调用方使用）"""
+        if self._http_client is not None and not self._client_is_closed():
+            if HTTPX_AVAILABLE:
+                await self._http_client.aclose()
+            else:
+                await self._http_client.close()
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+        # 信号量会绑定到使用它的事件循环，关闭后重新创建
+        self._host_semaphores.clear()
+        self._closed = True
+    
+    def close(self):
+        """释放网络会话、磁盘缓存和实例自己的事件循环，可重复调用"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.run_until_complete(self.aclose())
+            loop.close()
+        elif not self._closed:
+            # 没有事件循环就不会创建过HTTP客户端
+            if self._disk_cache is not None:
+                self._disk_cache.close()
+            self._closed = True
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
     
-    def _deduplicate_results(self, results: List[WebSearchResult]) -> List[WebSearchResult]:
-        """去重搜索结果"""
-        seen_urls = set()
-        unique_results = []
-        
-        for result in results:
-            if result.url not in seen_urls and result.url:
-                seen_urls.add(result.url)
-                unique_results.append(result)
-        
-        # 按标题长度和URL质量排序
-        unique_results.sort(key=lambda x: (len(x.title), len(x.snippet)), reverse=True)
-        return unique_results
-    
-    def _concurrent_fetch_content(self, results: List[WebSearchResult], query: str) -> List[WebSearchResult]:
-        """并发获取网页内容"""
-        enriched_results = []
-        
-        # 使用线程池并发获取内容
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_result = {
-                executor.submit(self._fetch_and_process_content, result, query): result 
-                for result in results
-            }
-            
-            for future in as_completed(future_to_result, timeout=60):
-                result = future_to_result[future]
-                try:
-                    processed_result = future.result(timeout=15)
-                    if processed_result:
-                        enriched_results.append(processed_result)
-                        print(f"✓ 成功获取: {result.title[:30]}... ({len(processed_result.content)}字符)")
-                    else:
-                        print(f"⚠ 内容获取失败: {result.title[:30]}...")
-                except Exception as e:
-                    print(f"⚠ 处理失败 {result.title[:30]}...: {e}")
-        
-        return enriched_results
-    
-    def _fetch_and_process_content(self, result: WebSearchResult, query: str) -> Optional[WebSearchResult]:
-        """获取并处理单个网页内容"""
-        try:
-            content = self._fetch_webpage_content(result.url)
-            if content:
-                result.content = content
-                result.relevance_score = self._calculate_relevance(query, result)
-                return result
-            return None
-        except Exception as e:
-            print(f"获取内容异常 {result.url}: {e}")
-            return None
-    
-    def _fallback_search(self, query: str) -> List[WebSearchResult]:
-        """备用搜索方法"""
-        print("使用备用搜索方法...")
-        
-        # 模拟一些相关的搜索结果
-        fallback_results = [
-            WebSearchResult(
-                title=f"关于{query}的学术资源",
-                url="https://scholar.google.com",
-                snippet=f"学术搜索结果关于{query}的相关研究和论文"
-            ),
-            WebSearchResult(
-                title=f"{query} - 维基百科",
-                url="https://zh.wikipedia.org",
-                snippet=f"维基百科关于{query}的详细介绍和背景信息"
-            ),
-            WebSearchResult(
-                title=f"{query}技术文档",
-                url="https://docs.example.com",
-                snippet=f"技术文档和教程关于{query}的实现和应用"
-            )
-        ]
-        
-        print(f"✓ 备用搜索完成，生成 {len(fallback_results)} 个模拟结果")
-        return fallback_results
-    
-    def _fetch_webpage_content(self, url: str) -> str:
-        """获取网页内容"""
-        try:
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            if not BS4_AVAILABLE:
-                # 简单的文本提取
-                return response.text[:2000]  # 限制长度
-            
-            # 使用BeautifulSoup解析
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 移除脚本和样式
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # 提取主要内容
-            content_selectors = [
-                'article', 'main', '.content', '#content',
-                '.post-content', '.entry-content', '.article-content'
-            ]
-            
-            main_content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    main_content = elements[0].get_text(strip=True)
-                    break
-            
-            if not main_content:
-                # 提取body内容
-                body = soup.find('body')
-                if body:
-                    main_content = body.get_text(strip=True)
-                else:
-                    main_content = soup.get_text(strip=True)
-            
-            # 清理和限制长度
-            lines = main_content.split('\n')
-            cleaned_lines = [line.strip() for line in lines if line.strip()]
-            content = '\n'.join(cleaned_lines)
-            
-            # 限制内容长度
-            if len(content) > 3000:
-                content = content[:3000] + "..."
-            
-            return content
-            
-        except Exception as e:
-            print(f"⚠ 网页内容获取失败 ({url}): {e}")
-            return ""
-    
-    def _calculate_relevance(self, query: str, result: WebSearchResult) -> float:
-        """计算相关性分数"""
-        try:
-            query_words = set(query.lower().split())
-            
-            # 检查标题相关性
-            title_words = set(result.title.lower().split())
-            title_score = len(query_words.intersection(title_words)) / len(query_words) if query_words else 0
-            
-            # 检查内容相关性
-            content_words = set(result.content.lower().split())
-            content_score = len(query_words.intersection(content_words)) / len(query_words) if query_words else 0
-            
-            # 综合分数
-            relevance = (title_score * 0.4 + content_score * 0.6)
-            return min(relevance, 1.0)
-            
-        except Exception:
-            return 0.5  # 默认分数
-    
-    def _analyze_web_content(self, query: str, results: List[WebSearchResult]) -> str:
-        """分析网页内容"""
-        try:
-            # 合并所有内容
-            all_content = []
-            sources = []
-            
-            for result in results:
-                if result.content:
-                    all_content.append(f"来源: {result.title}\n{result.content}")
-                    sources.append(result.title)
-            
-            if not all_content:
-                return f"未能获取到关于'{query}'的有效网页内容。"
-            
-            # 生成分析摘要
-            analysis = f"基于{len(results)}个网页源的研究分析:\n\n"
-            
-            # 添加来源信息
-            analysis += "信息来源:\n"
-            for i, source in enumerate(sources, 1):
-                analysis += f"{i}. {source}\n"
-            analysis += "\n"
-            
-            # 添加内容摘要
-            analysis += "内容摘要:\n"
-            combined_content = "\n\n".join(all_content)
-            
-            # 简单的内容摘要（取前1000字符）
-            if len(combined_content) > 1000:
-                analysis += combined_content[:1000] + "...\n\n"
-            else:
-                analysis += combined_content + "\n\n"
-            
-            # 添加关键信息提取
-            analysis += f"关于'{query}'的关键信息已从上述网页源中提取和整理。"
-            
-            return analysis
-            
-        except Exception as e:
-            return f"内容分析过程中出现错误: {e}"
-    
-    def _create_fallback_result(self, query: str, error: str = "") -> Dict[str, Any]:
-        """创建备用结果"""
-        fallback_content = f"""
-关于'{query}'的网页研究信息:
-
-由于网络限制或搜索服务不可用，无法获取实时网页内容。
-建议的研究方向:
-
-1. 学术资源: 查找相关的学术论文和研究报告
-2. 官方文档: 查阅官方技术文档和规范
-3. 社区讨论: 参考技术社区的讨论和经验分享
-4. 实践案例: 寻找实际应用案例和最佳实践
-
-如需获取最新信息，建议直接访问相关官方网站或学术数据库。
-"""
-        
-        if error:
-            fallback_content += f"\n错误信息: {error}"
-        
-        return {
-            'query': query,
-            'search_results': [],
-            'analysis': fallback_content,
-            'total_sources': 0,
-            'research_method': 'Fallback Research',
-            'note': '由于网络或服务限制，使用了备用研究方法'
-        }
-    
-"""
-增强的网页研究系统 - 真实网页内容获取和分析
-"""
-
-import os
-import time
-import requests
-import asyncio
-import aiohttp
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin, urlparse
-import json
-from dataclasses import dataclass
-
-try:
-    from bs4 import BeautifulSoup
-    BS4_AVAILABLE = True
-except ImportError:
-    print("⚠ BeautifulSoup4未安装，网页解析功能受限")
-    BS4_AVAILABLE = False
-
-try:
-    from duckduckgo_search import DDGS
-    DDGS_AVAILABLE = True
-except ImportError:
-    print("⚠ duckduckgo-search未安装，搜索功能受限")
-    DDGS_AVAILABLE = False
-
-@dataclass
-class WebSearchResult:
-    """网页搜索结果"""
-    title: str
-    url: str
-    snippet: str
-    content: str = ""
-    relevance_score: float = 0.0
-
-class EnhancedWebResearchSystem:
-    """增强的网页研究系统 - 支持并发搜索"""
-    
-    def __init__(self, max_results: int = 5, timeout: int = 10, max_workers: int = 3):
-        self.max_results = max_results
-        self.timeout = timeout
-        self.max_workers = max_workers  # 并发工作线程数
-        # 添加搜索间隔控制，避免被限制
-        self.last_search_time = 0
-        self.min_search_interval = 1  # 减少间隔，因为使用并发
-        
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        
-        # 创建线程池
-        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
-        
-        print("网页研究系统初始化:")
-        print(f"  BeautifulSoup4: {'✓' if BS4_AVAILABLE else '✗'}")
-        print(f"  DuckDuckGo搜索: {'✓' if DDGS_AVAILABLE else '✗'}")
-        print(f"  并发搜索: {self.max_workers} 个工作线程")
-        print(f"  搜索间隔控制: {self.min_search_interval}秒")
-    
-    def research_topic(self, query: str, max_pages: int = 3) -> Dict[str, Any]:
-        """研究主题 - 并发搜索并分析网页内容"""
-        print(f"\n开始并发网页研究: {query}")
-        print("="*50)
-        
-        try:
-            # 步骤1: 并发搜索相关网页
-            search_results = self._concurrent_search_web(query)
-            if not search_results:
-                return self._create_fallback_result(query)
-            
-            print(f"✓ 找到 {len(search_results)} 个搜索结果")
-            
-            # 步骤2: 并发获取网页内容
-            target_results = search_results[:max_pages]
-            print(f"⚡ 开始并发获取 {len(target_results)} 个网页内容...")
-            
-            enriched_results = self._concurrent_fetch_content(target_results, query)
-            
-            if not enriched_results:
-                return self._create_fallback_result(query)
-            
-            # 步骤3: 分析和总结
-            analysis = self._analyze_web_content(query, enriched_results)
-            
-            print(f"✓ 并发网页研究完成，分析了 {len(enriched_results)} 个网页")
-            
-            return {
-                'query': query,
-                'search_results': enriched_results,
-                'analysis': analysis,
-                'total_sources': len(enriched_results),
-                'research_method': 'Enhanced Concurrent Web Research'
-            }
-            
-        except Exception as e:
-            print(f"⚠ 并发网页研究失败: {e}")
-            return self._create_fallback_result(query, str(e))
-    
-    def _concurrent_search_web(self, query: str) -> List[WebSearchResult]:
-        """并发搜索网页 - 使用多个搜索策略"""
-        print("⚡ 启动并发搜索...")
-        
-        # 定义多个搜索任务
-        search_tasks = [
-            ("DuckDuckGo Lite", self._search_duckduckgo_lite, query),
-            ("DuckDuckGo 标准", self._search_duckduckgo_standard, query),
-            ("备用搜索", self._fallback_search, query)
-        ]
-        
-        all_results = []
-        
-        # 使用线程池并发执行搜索
-        with ThreadPoolExecutor(max_workers=len(search_tasks)) as executor:
-            future_to_task = {
-                executor.submit(task_func, task_query): task_name 
-                for task_name, task_func, task_query in search_tasks
-            }
-            
-            for future in as_completed(future_to_task, timeout=30):
-                task_name = future_to_task[future]
-                try:
-                    results = future.result(timeout=10)
-                    if results:
-                        print(f"✓ {task_name} 完成，获得 {len(results)} 个结果")
-                        all_results.extend(results)
-                    else:
-                        print(f"⚠ {task_name} 未获得结果")
-                except Exception as e:
-                    print(f"⚠ {task_name} 失败: {e}")
-        
-        # 去重并排序
-        unique_results = self._deduplicate_results(all_results)
-        print(f"✓ 并发搜索完成，总共获得 {len(unique_results)} 个唯一结果")
-        
-        return unique_results[:self.max_results]
-    
-    def _search_duckduckgo_lite(self, query: str) -> List[WebSearchResult]:
-        """DuckDuckGo Lite 搜索"""
-        if not DDGS_AVAILABLE:
-            return []
-        
-        try:
-            # 控制搜索频率
-            current_time = time.time()
-            time_since_last_search = current_time - self.last_search_time
-            if time_since_last_search < self.min_search_interval:
-                wait_time = self.min_search_interval - time_since_last_search
-                time.sleep(wait_time)
-            
-            with DDGS(
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
-                timeout=self.timeout,
-                proxies=None
-            ) as ddgs:
-                search_results = list(ddgs.text(
-                    keywords=query,
-                    max_results=3,
-                    region='wt-wt',
-                    safesearch='moderate',
-                    backend='lite'
-                ))
-                
-                results = []
-                for result in search_results:
-                    web_result = WebSearchResult(
-                        title=result.get('title', ''),
-                        url=result.get('href', ''),
-                        snippet=result.get('body', '')
-                    )
-                    results.append(web_result)
-                
-                self.last_search_time = time.time()
-                return results
-                
-        except Exception as e:
-            print(f"DuckDuckGo Lite 搜索异常: {e}")
-            return []
-    
-    def _search_duckduckgo_standard(self, query: str) -> List[WebSearchResult]:
-        """DuckDuckGo 标准搜索"""
-        if not DDGS_AVAILABLE:
-            return []
-        
-        try:
-            time.sleep(1)  # 稍微延迟避免冲突
-            
-            with DDGS() as ddgs:
-                search_results = list(ddgs.text(
-                    keywords=query,
-                    max_results=2,
-                    region='us-en',
-                    safesearch='off'
-                ))
-                
-                results = []
-                for result in search_results:
-                    web_result = WebSearchResult(
-                        title=result.get('title', ''),
-                        url=result.get('href', ''),
-                        snippet=result.get('body', '')
-                    )
-                    results.append(web_result)
-                
-                return results
-                
-        except Exception as e:
-            print(f"DuckDuckGo 标准搜索异常: {e}")
-            return []
-    
-    def _deduplicate_results(self, results: List[WebSearchResult]) -> List[WebSearchResult]:
-        """去重搜索结果"""
-        seen_urls = set()
-        unique_results = []
-        
-        for result in results:
-            if result.url not in seen_urls and result.url:
-                seen_urls.add(result.url)
-                unique_results.append(result)
-        
-        # 按标题长度和URL质量排序
-        unique_results.sort(key=lambda x: (len(x.title), len(x.snippet)), reverse=True)
-        return unique_results
-    
-    def _concurrent_fetch_content(self, results: List[WebSearchResult], query: str) -> List[WebSearchResult]:
-        """并发获取网页内容"""
-        enriched_results = []
-        
-        # 使用线程池并发获取内容
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_result = {
-                executor.submit(self._fetch_and_process_content, result, query): result 
-                for result in results
-            }
-            
-            for future in as_completed(future_to_result, timeout=60):
-                result = future_to_result[future]
-                try:
-                    processed_result = future.result(timeout=15)
-                    if processed_result:
-                        enriched_results.append(processed_result)
-                        print(f"✓ 成功获取: {result.title[:30]}... ({len(processed_result.content)}字符)")
-                    else:
-                        print(f"⚠ 内容获取失败: {result.title[:30]}...")
-                except Exception as e:
-                    print(f"⚠ 处理失败 {result.title[:30]}...: {e}")
-        
-        return enriched_results
-    
-    def _fetch_and_process_content(self, result: WebSearchResult, query: str) -> Optional[WebSearchResult]:
-        """获取并处理单个网页内容"""
-        try:
-            content = self._fetch_webpage_content(result.url)
-            if content:
-                result.content = content
-                result.relevance_score = self._calculate_relevance(query, result)
-                return result
-            return None
-        except Exception as e:
-            print(f"获取内容异常 {result.url}: {e}")
-            return None
-    
-    def _fallback_search(self, query: str) -> List[WebSearchResult]:
-        """备用搜索方法"""
-        print("使用备用搜索方法...")
-        
-        # 模拟一些相关的搜索结果
-        fallback_results = [
-            WebSearchResult(
-                title=f"关于{query}的学术资源",
-                url="https://scholar.google.com",
-                snippet=f"学术搜索结果关于{query}的相关研究和论文"
-            ),
-            WebSearchResult(
-                title=f"{query} - 维基百科",
-                url="https://zh.wikipedia.org",
-                snippet=f"维基百科关于{query}的详细介绍和背景信息"
-            ),
-            WebSearchResult(
-                title=f"{query}技术文档",
-                url="https://docs.example.com",
-                snippet=f"技术文档和教程关于{query}的实现和应用"
+    def __del__(self):
+        if not getattr(self, '_closed', True):
+            warnings.warn(
+                f"{type(self).__name__} 未调用close()，网络会话可能未释放",
+                ResourceWarning, stacklevel=2
             )
-        ]
-        
-        print(f"✓ 备用搜索完成，生成 {len(fallback_results)} 个模拟结果")
-        return fallback_results
-    
-    def _fetch_webpage_content(self, url: str) -> str:
-        """获取网页内容"""
-        try:
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            if not BS4_AVAILABLE:
-                # 简单的文本提取
-                return response.text[:2000]  # 限制长度
-            
-            # 使用BeautifulSoup解析
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 移除脚本和样式
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # 提取主要内容
-            content_selectors = [
-                'article', 'main', '.content', '#content',
-                '.post-content', '.entry-content', '.article-content'
-            ]
-            
-            main_content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    main_content = elements[0].get_text(strip=True)
-                    break
-            
-            if not main_content:
-                # 提取body内容
-                body = soup.find('body')
-                if body:
-                    main_content = body.get_text(strip=True)
-                else:
-                    main_content = soup.get_text(strip=True)
-            
-            # 清理和限制长度
-            lines = main_content.split('\n')
-            cleaned_lines = [line.strip() for line in lines if line.strip()]
-            content = '\n'.join(cleaned_lines)
-            
-            # 限制内容长度
-            if len(content) > 3000:
-                content = content[:3000] + "..."
-            
-            return content
-            
-        except Exception as e:
-            print(f"⚠ 网页内容获取失败 ({url}): {e}")
-            return ""
-    
-    def _calculate_relevance(self, query: str, result: WebSearchResult) -> float:
-        """计算相关性分数"""
-        try:
-            query_words = set(query.lower().split())
-            
-            # 检查标题相关性
-            title_words = set(result.title.lower().split())
-            title_score = len(query_words.intersection(title_words)) / len(query_words) if query_words else 0
-            
-            # 检查内容相关性
-            content_words = set(result.content.lower().split())
-            content_score = len(query_words.intersection(content_words)) / len(query_words) if query_words else 0
-            
-            # 综合分数
-            relevance = (title_score * 0.4 + content_score * 0.6)
-            return min(relevance, 1.0)
-            
-        except Exception:
-            return 0.5  # 默认分数
-    
-    def _analyze_web_content(self, query: str, results: List[WebSearchResult]) -> str:
-        """分析网页内容"""
-        try:
-            # 合并所有内容
-            all_content = []
-            sources = []
-            
-            for result in results:
-                if result.content:
-                    all_content.append(f"来源: {result.title}\n{result.content}")
-                    sources.append(result.title)
-            
-            if not all_content:
-                return f"未能获取到关于'{query}'的有效网页内容。"
-            
-            # 生成分析摘要
-            analysis = f"基于{len(results)}个网页源的研究分析:\n\n"
-            
-            # 添加来源信息
-            analysis += "信息来源:\n"
-            for i, source in enumerate(sources, 1):
-                analysis += f"{i}. {source}\n"
-            analysis += "\n"
-            
-            # 添加内容摘要
-            analysis += "内容摘要:\n"
-            combined_content = "\n\n".join(all_content)
-            
-            # 简单的内容摘要（取前1000字符）
-            if len(combined_content) > 1000:
-                analysis += combined_content[:1000] + "...\n\n"
-            else:
-                analysis += combined_content + "\n\n"
-            
-            # 添加关键信息提取
-            analysis += f"关于'{query}'的关键信息已从上述网页源中提取和整理。"
-            
-            return analysis
-            
-        except Exception as e:
-            return f"内容分析过程中出现错误: {e}"
-    
-    def _create_fallback_result(self, query: str, error: str = "") -> Dict[str, Any]:
-        """创建备用结果"""
-        fallback_content = f"""
-关于'{query}'的网页研究信息:
-
-由于网络限制或搜索服务不可用，无法获取实时网页内容。
-建议的研究方向:
-
-1. 学术资源: 查找相关的学术论文和研究报告
-2. 官方文档: 查阅官方技术文档和规范
-3. 社区讨论: 参考技术社区的讨论和经验分享
-4. 实践案例: 寻找实际应用案例和最佳实践
-
-如需获取最新信息，建议直接访问相关官方网站或学术数据库。
-"""
-        
-        if error:
-            fallback_content += f"\n错误信息: {error}"
-        
-        return {
-            'query': query,
-            'search_results': [],
-            'analysis': fallback_content,
-            'total_sources': 0,
-            'research_method': 'Fallback Research',
-            'note': '由于网络或服务限制，使用了备用研究方法'
-        }
-    
-    def get_research_statistics(self) -> Dict[str, Any]:
-        """获取研究统计信息"""
-        return {
-            'bs4_available': BS4_AVAILABLE,
-            'ddgs_available': DDGS_AVAILABLE,
-            'max_results': self.max_results,
-            'timeout': self.timeout,
-            'min_search_interval': self.min_search_interval,
-            'last_search_time': self.last_search_time
-        }
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+结果保存测试
+"""
+
+import json
+from dataclasses import dataclass
+
+import pytest
+
+from enhanced_user_interface import EnhancedUserInterface
+
+
+@dataclass
+class _Source:
+    title: str
+    page: int
+
+
+def test_write_results_jsonl_round_trip(tmp_path):
+    """写入的JSON Lines文件可以逐行读回"""
+    results = {
+        'original_query': '什么是RAG',
+        'rewritten_query': None,
+        'retrieval_method': 'hybrid',
+        'final_answer': '检索增强生成',
+        'retrieved_docs': [
+            {'text': '文档一', 'rrf_score': 0.5, 'source': _Source('a.pdf', 3)},
+            {'text': '文档二', 'similarity': 0.25, 'ranks': {1: 'bm25', 2: 'dense'}},
+        ],
+    }
+    path = tmp_path / 'results.jsonl'
+
+    EnhancedUserInterface._write_results_jsonl(results, str(path))
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 3
+    assert records[0]['original_query'] == '什么是RAG'
+    assert records[0]['document_count'] == 2
+    assert records[1]['source'] == {'title': 'a.pdf', 'page': 3}
+    assert records[2]['ranks'] == {'1': 'bm25', '2': 'dense'}
+
+
+def test_write_results_jsonl_leaves_no_partial_file(tmp_path):
+    """文档无法序列化时不创建文件"""
+    results = {'retrieved_docs': [{'text': '文档一'}, {'text': object()}]}
+    path = tmp_path / 'results.jsonl'
+
+    with pytest.raises(TypeError):
+        EnhancedUserInterface._write_results_jsonl(results, str(path))
+
+    assert not path.exists()
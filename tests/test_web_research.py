@@ -0,0 +1,24 @@
+"""
+网页正文提取测试
+"""
+
+from enhanced_web_research import EnhancedWebResearchSystem
+
+
+def test_form_wrapped_page_keeps_content():
+    """ASP.NET风格用<form>包裹整页的网页不应提取为空"""
+    html = (
+        b'<html><body><form id="form1" method="post">'
+        b'<header><h1>Quarterly Report</h1></header>'
+        b'<nav>Home | About</nav>'
+        b'<div><p>Revenue grew by twelve percent this quarter.</p></div>'
+        b'<footer>Copyright</footer>'
+        b'</form></body></html>'
+    )
+
+    text = EnhancedWebResearchSystem._extract_webpage_text(html)
+
+    assert 'Revenue grew by twelve percent this quarter.' in text
+    assert 'Quarterly Report' in text
+    assert 'Home | About' not in text
+    assert 'Copyright' not in text